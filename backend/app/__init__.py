@@ -1,6 +1,8 @@
 from flask import Flask
 from flask_cors import CORS
 from .db import init_db
+from .cli import register_commands
+from .encoding import OrjsonProvider
 from .auth.routes import auth_bp
 from .stocks.routes import stocks_bp
 from .watchlist.routes import watchlist_bp
@@ -13,7 +15,25 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
         MONGO_URI=os.environ.get('MONGO_URI'),
-        MONGO_DBNAME='bdshare'
+        MONGO_DBNAME='bdshare',
+        # Set to 0 once scripts/train_models.py runs on a schedule, so
+        # prediction requests only ever serve registered models.
+        PREDICTION_TRAIN_ON_REQUEST=os.environ.get('PREDICTION_TRAIN_ON_REQUEST', '1') == '1',
+        # Default forecaster tier: 'lstm', or the TensorFlow-free 'ridge' / 'ets'.
+        PREDICTION_MODEL=os.environ.get('PREDICTION_MODEL', 'lstm'),
+        # Set to 1 when scripts/poll_market.py keeps the price/index caches
+        # fresh; request handlers then never scrape DSE themselves.
+        MARKET_POLLER_ENABLED=os.environ.get('MARKET_POLLER_ENABLED', '0') == '1',
+        # How long each worker reuses its in-memory copy of the price and
+        # index feeds before re-reading Mongo.
+        FEED_LOCAL_TTL_SECONDS=int(os.environ.get('FEED_LOCAL_TTL_SECONDS', 10)),
+        # Open price streams per worker. Each holds one of the worker's
+        # gthread threads (64 in the Procfile), so keep this well below the
+        # thread count; extra clients get 503 and poll instead.
+        STREAM_MAX_PER_WORKER=int(os.environ.get('STREAM_MAX_PER_WORKER', 32)),
+        # Create the collections' indexes on startup (idempotent); turn off
+        # where the app user lacks createIndex rights.
+        MONGO_ENSURE_INDEXES=os.environ.get('MONGO_ENSURE_INDEXES', '1') == '1'
     )
 
     if test_config:
@@ -22,12 +42,17 @@ def create_app(test_config=None):
     # Initialize extensions
     CORS(app)
     init_db(app)
+    # After init_db: Flask-PyMongo 3 installs its own BSON provider in
+    # init_app, which would otherwise replace this one.
+    app.json = OrjsonProvider(app)
 
     # Register Blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(stocks_bp, url_prefix='/api/stocks')
     app.register_blueprint(watchlist_bp, url_prefix='/api/watchlist')
 
+    register_commands(app)
+
     @app.route('/health')
     def health():
         return {"status": "ok"}
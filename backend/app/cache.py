@@ -0,0 +1,96 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+
+
+class TTLCache:
+    """
+    Small in-process cache with stale-while-revalidate and single-flight loads.
+
+    get(key, loader, ttl, stale_ttl) returns the cached value while it is
+    younger than ttl. Between ttl and stale_ttl the old value is returned
+    immediately and one background thread reloads it. Past stale_ttl (or on a
+    miss) callers block, but only one of them runs loader; the rest wait for
+    its result instead of loading the same key concurrently.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _load(self, key, loader):
+        value = loader()
+        self._entries[key] = (value, time.monotonic())
+        return value
+
+    def _revalidate(self, key, loader, lock):
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            print(f"Error refreshing cache key {key}: {e}")
+        finally:
+            lock.release()
+
+    def get(self, key, loader, ttl, stale_ttl=None):
+        stale_ttl = stale_ttl if stale_ttl is not None else ttl
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry:
+            age = now - entry[1]
+            if age < ttl:
+                return entry[0]
+            if age < stale_ttl:
+                lock = self._lock_for(key)
+                if lock.acquire(blocking=False):
+                    threading.Thread(
+                        target=self._revalidate, args=(key, loader, lock), daemon=True
+                    ).start()
+                return entry[0]
+
+        lock = self._lock_for(key)
+        with lock:
+            # Another caller may have loaded the key while we waited.
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[1] < ttl:
+                return entry[0]
+            return self._load(key, loader)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+def acquire_lease(db, key, seconds):
+    """
+    Takes a cross-process lease on key in `cache_leases`, so only one worker
+    refreshes a shared cache at a time. Returns a token for release_lease, or
+    None if another holder's lease has not expired yet.
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    try:
+        db.cache_leases.update_one(
+            {"_id": key, "$or": [{"expires_at": {"$lt": now}}, {"expires_at": {"$exists": False}}]},
+            {"$set": {"token": token, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return None
+    return token
+
+
+def release_lease(db, key, token):
+    db.cache_leases.delete_one({"_id": key, "token": token})
@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import click
+
+# Modules that should never be imported just by booting the app; they are
+# loaded on first use by the endpoints that need them.
+HEAVY_MODULES = ('tensorflow', 'keras', 'sklearn', 'pandas', 'bs4', 'lxml')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """Parses `python -X importtime` output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def audited_queries(symbol):
+    """(name, collection, find command arguments) for the queries the routes run."""
+    from datetime import datetime, timedelta
+    from bson import ObjectId
+    now = datetime.utcnow()
+    queries = [
+        ('get_stocks (by volume)', 'stocks', {'filter': {}, 'sort': {'volume': -1}, 'limit': 50}),
+        ('get_stocks (by change)', 'stocks', {'filter': {}, 'sort': {'change': -1}, 'limit': 50}),
+        ('get_stocks (by percent_change)', 'stocks', {'filter': {}, 'sort': {'percent_change': -1}, 'limit': 50}),
+        ('get_stock', 'stocks', {'filter': {'symbol': symbol}}),
+        ('watchlist stocks', 'stocks', {'filter': {'symbol': {'$in': [symbol]}}}),
+        ('stale company details', 'stocks', {'filter': {'details_updated_at': {'$lt': now}}}),
+        ('watchlist user', 'users', {'filter': {'_id': ObjectId()}}),
+        ('login', 'users', {'filter': {'email': 'audit@example.com'}}),
+        ('latest prices feed', 'latest_prices_cache', {'filter': {'type': 'all_prices'}}),
+        ('indices feed', 'indices_cache', {'filter': {'type': 'market_indices'}}),
+        ('history', 'daily_bars', {'filter': {'symbol': symbol, 'date': {'$gte': now - timedelta(days=365)}},
+                                   'sort': {'date': 1}}),
+        ('history sync state', 'history_sync', {'filter': {'symbol': symbol}}),
+        ('intraday', 'intraday_bars', {'filter': {'symbol': symbol, 'day': now.strftime('%Y-%m-%d')}}),
+        ('intraday latest day', 'intraday_bars', {'filter': {'symbol': symbol}, 'sort': {'day': -1}, 'limit': 1}),
+        ('active prediction job', 'prediction_jobs',
+         {'filter': {'symbol': symbol, 'days': 7, 'model': 'lstm', 'active': True}}),
+        ('price changes since', 'price_changes', {'filter': {'_id': {'$gt': ObjectId()}}}),
+    ]
+    return queries
+
+
+def plan_stages(plan):
+    """Every stage name in an explain() winning plan, outermost first."""
+    stages = [plan.get('stage')]
+    for child in [plan.get('inputStage')] + plan.get('inputStages', []):
+        if child:
+            stages += plan_stages(child)
+    return [s for s in stages if s]
+
+
+def register_commands(app):
+    @app.cli.command('import-report')
+    @click.option('--top', default=15, help='Number of direct imports to list.')
+    def import_report(top):
+        """Reports what app startup imports and how long each import takes."""
+        code = 'from app import create_app; create_app()'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            click.echo(result.stderr.splitlines()[-1] if result.stderr else 'Startup failed')
+            sys.exit(1)
+
+        rows = parse_importtime(result.stderr)
+        total_us = sum(r[2] for r in rows if r[3] == 0)
+        # Depth 0 is mostly the `app` package itself; what it pulls in directly
+        # (depth 1) is where a regression shows up.
+        direct = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)
+
+        click.echo(f"Startup imports: {len(rows)} modules, {total_us / 1000:.1f} ms")
+        click.echo(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for name, self_us, cumulative_us, _ in direct[:top]:
+            click.echo(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+        loaded = {r[0].split('.')[0] for r in rows}
+        heavy = [m for m in HEAVY_MODULES if m in loaded]
+        if heavy:
+            click.echo(f"WARNING: heavy modules imported at startup: {', '.join(heavy)}")
+            sys.exit(1)
+
+    @app.cli.command('audit-queries')
+    @click.option('--symbol', default=None, help='Symbol to plug into per-symbol queries.')
+    def audit_queries(symbol):
+        """Explains each route's Mongo query and flags collection scans."""
+        from .db import mongo
+        db = mongo.db
+        if not symbol:
+            stock = db.stocks.find_one({}, {'symbol': 1})
+            symbol = stock['symbol'] if stock else 'GP'
+
+        scans = 0
+        for name, collection, find in audited_queries(symbol):
+            result = db.command('explain', {'find': collection, **find}, verbosity='queryPlanner')
+            planner = result.get('queryPlanner', {})
+            # Slot-based engine plans nest the classic tree under queryPlan.
+            winning = planner.get('winningPlan', {})
+            stages = plan_stages(winning.get('queryPlan', winning))
+            flag = 'COLLSCAN' if 'COLLSCAN' in stages else 'ok'
+            scans += flag == 'COLLSCAN'
+            click.echo(f"{flag:8}  {collection}.{name}: {' <- '.join(stages)}")
+
+        if scans:
+            click.echo(f"WARNING: {scans} queries scan a whole collection; run ensure_indexes or add an index.")
+            sys.exit(1)
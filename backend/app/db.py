@@ -1,10 +1,63 @@
 from flask_pymongo import PyMongo
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
 import os
+import threading
 import certifi
 
 mongo = PyMongo()
 
+# Indexes for the collections the request handlers query directly.
+# Collections owned by one module (daily bars, intraday bars, jobs, the
+# price change log) declare theirs in that module; ensure_indexes()
+# provisions both at startup.
+INDEXES = {
+    'stocks': [
+        IndexModel([("symbol", ASCENDING)], unique=True),
+        # get_stocks sort orders; symbol keeps paging stable on ties.
+        IndexModel([("volume", DESCENDING), ("symbol", ASCENDING)]),
+        IndexModel([("change", DESCENDING), ("symbol", ASCENDING)]),
+        IndexModel([("percent_change", DESCENDING), ("symbol", ASCENDING)]),
+        IndexModel([("details_updated_at", ASCENDING)]),
+    ],
+    'users': [IndexModel([("email", ASCENDING)], unique=True)],
+    'latest_prices_cache': [IndexModel([("type", ASCENDING)], unique=True)],
+    'indices_cache': [IndexModel([("type", ASCENDING)], unique=True)],
+    # Model files by symbol, for pruning superseded pairs after a save.
+    'models.files': [IndexModel([("metadata.symbol", ASCENDING)])],
+}
+
+def ensure_indexes(db):
+    """Creates every index the app relies on; a failure is reported, not raised."""
+    from .stocks.history_store import ensure_history_indexes
+    from .stocks.intraday import ensure_intraday_indexes
+    from .stocks.jobs import ensure_job_indexes
+    from .stocks.price_stream import ensure_changes_collection
+
+    # One index at a time, so e.g. duplicate symbols blocking the unique
+    # index do not also block the sort indexes.
+    steps = [(name, lambda model=model, name=name: db[name].create_indexes([model]))
+             for name, models in INDEXES.items() for model in models]
+    steps += [
+        ('daily_bars', lambda: ensure_history_indexes(db)),
+        ('intraday_bars', lambda: ensure_intraday_indexes(db)),
+        ('prediction_jobs', lambda: ensure_job_indexes(db)),
+        ('price_changes', lambda: ensure_changes_collection(db)),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except ConnectionFailure as e:
+            print(f"Skipping index creation, database unreachable: {e}")
+            return
+        except PyMongoError as e:
+            # e.g. duplicate symbols already stored block the unique index.
+            print(f"Error creating indexes for {name}: {e}")
+
 def init_db(app):
     app.config["MONGO_URI"] = os.getenv("MONGO_URI")
     app.config["MONGO_DBNAME"] = 'bdshare'
     mongo.init_app(app, tlsCAFile=certifi.where())
+    if app.config.get("MONGO_ENSURE_INDEXES", True) and mongo.db is not None:
+        # In the background so a slow or unreachable database never blocks startup.
+        threading.Thread(target=ensure_indexes, args=(mongo.db,), name='ensure-indexes', daemon=True).start()
@@ -0,0 +1,88 @@
+import orjson
+from bson import ObjectId
+from flask import current_app, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+# Response encoding shared by the blueprints. OrjsonProvider replaces
+# Flask's stdlib JSON provider (same output: HTTP dates, sorted keys, plus
+# ObjectId as a string). Bulk endpoints pass their rows through shape_rows()
+# and respond(), which honour:
+#   ?fields=symbol,ltp      only these fields per row
+#   ?format=columns         one array per field instead of one object per row
+#                           (also selected by Accept: COLUMNS_MIMETYPE)
+#   Accept: application/msgpack   MessagePack instead of JSON
+COLUMNS_MIMETYPE = 'application/vnd.shapla.columns+json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def _encode_default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    if hasattr(o, 'tolist'):
+        # NumPy scalars and arrays from the forecasting code.
+        return o.tolist()
+    return DefaultJSONProvider.default(o)
+
+
+def encode_json(obj, option=0):
+    """JSON bytes for obj with the app's conventions, for payloads sent outside jsonify."""
+    return orjson.dumps(obj, default=_encode_default,
+                        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | option)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, indent=False):
+        option = 0
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return encode_json(obj, self._options(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = encode_json(obj, self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def requested_fields():
+    """Returns the ?fields= projection as a list, or None for every field."""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(',') if f.strip()]
+
+
+def wants_columns():
+    return request.args.get('format') == 'columns' or \
+        request.accept_mimetypes.best == COLUMNS_MIMETYPE
+
+
+def shape_rows(rows, fields=None):
+    """Projects rows to the requested fields and, if asked, turns them into columns."""
+    fields = fields if fields is not None else requested_fields()
+    if fields:
+        rows = [{f: row.get(f) for f in fields} for row in rows]
+    if not wants_columns():
+        return rows
+
+    if not fields:
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+    return {f: [row.get(f) for row in rows] for f in fields}
+
+
+def respond(payload, status=200):
+    """Serializes payload as MessagePack when the client prefers it, JSON otherwise."""
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    if best in MSGPACK_MIMETYPES:
+        import msgpack
+        body = msgpack.packb(payload, default=_encode_default)
+        return current_app.response_class(body, status=status, mimetype=best)
+    return jsonify(payload), status
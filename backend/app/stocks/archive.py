@@ -0,0 +1,151 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# The multi-symbol DSE_Data.csv archive is converted once into memory-mapped
+# NumPy columns sorted by symbol and date, plus a symbol -> [start, stop)
+# offset index, so a lookup only slices one symbol's rows.
+#
+# Each build goes into its own `.archive-*` version directory next to the
+# archive path. The archive path is a symlink that is swapped atomically, so
+# readers always resolve a complete version. Builds run under an flock on
+# `<archive>.lock`, so only one worker or script converts the CSV at a time.
+# The previous version is kept for readers that resolved it just before a
+# swap; older ones are removed.
+ARCHIVE_DIRNAME = 'DSE_Data_archive'
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+CSV_CANDIDATES = [
+    os.path.join(os.path.dirname(__file__), 'DSE_Data.csv'),
+    os.path.join(_BACKEND_DIR, 'DSE_Data.csv'),
+]
+
+_archive = None
+
+
+def find_csv():
+    for path in CSV_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def archive_dir_for(csv_path):
+    return os.environ.get('DSE_ARCHIVE_DIR') or os.path.join(os.path.dirname(csv_path), ARCHIVE_DIRNAME)
+
+
+@contextmanager
+def _build_lock(out_dir):
+    with open(os.path.abspath(out_dir) + '.lock', 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _swap_in(version_dir, out_dir):
+    parent = os.path.dirname(version_dir)
+    previous = os.path.realpath(out_dir) if os.path.islink(out_dir) else None
+    if os.path.isdir(out_dir) and not os.path.islink(out_dir):
+        # A plain directory from an older build cannot be replaced by a link.
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    link = os.path.join(parent, f'.link-{os.path.basename(version_dir)}')
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, out_dir)
+
+    keep = {version_dir, previous}
+    for entry in os.listdir(parent):
+        path = os.path.join(parent, entry)
+        if entry.startswith('.archive-') and path not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def build_archive(csv_path, out_dir=None):
+    """Converts DSE_Data.csv into per-symbol partitioned .npy columns."""
+    out_dir = out_dir or archive_dir_for(csv_path)
+    with _build_lock(out_dir):
+        return _build(csv_path, out_dir)
+
+
+def _build(csv_path, out_dir):
+    df = pd.read_csv(csv_path, usecols=['Date', 'Trading_Code', 'Close'])
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df['Close'] = pd.to_numeric(df['Close'], errors='coerce')
+    df = df.dropna()
+    df['Trading_Code'] = df['Trading_Code'].astype(str).str.strip().str.upper()
+    df = df.sort_values(['Trading_Code', 'Date'], kind='mergesort')
+    df = df.drop_duplicates(subset=['Trading_Code', 'Date'], keep='last')
+
+    codes = df['Trading_Code'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    index = {codes[s]: [int(s), int(e)] for s, e in zip(starts, stops)}
+
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    version_dir = tempfile.mkdtemp(prefix='.archive-', dir=parent)
+    np.save(os.path.join(version_dir, 'dates.npy'), df['Date'].to_numpy(dtype='datetime64[D]'))
+    np.save(os.path.join(version_dir, 'closes.npy'), df['Close'].to_numpy(dtype='float64'))
+    with open(os.path.join(version_dir, 'index.json'), 'w') as f:
+        json.dump({'source_mtime': os.path.getmtime(csv_path), 'symbols': index}, f)
+
+    _swap_in(version_dir, os.path.abspath(out_dir))
+    return len(index)
+
+
+def _is_current(out_dir, csv_path):
+    try:
+        with open(os.path.join(out_dir, 'index.json')) as f:
+            return json.load(f).get('source_mtime') == os.path.getmtime(csv_path)
+    except (OSError, ValueError):
+        return False
+
+
+def load_archive():
+    """Returns the memory-mapped archive, building it on first use."""
+    global _archive
+    if _archive is not None:
+        return _archive
+
+    csv_path = find_csv()
+    if not csv_path:
+        return None
+
+    out_dir = archive_dir_for(csv_path)
+    if not _is_current(out_dir, csv_path):
+        with _build_lock(out_dir):
+            # Another worker may have built it while we waited.
+            if not _is_current(out_dir, csv_path):
+                _build(csv_path, out_dir)
+
+    # Resolve the link once so every file comes from the same version.
+    version_dir = os.path.realpath(out_dir)
+    with open(os.path.join(version_dir, 'index.json')) as f:
+        index = json.load(f)['symbols']
+    _archive = {
+        'dates': np.load(os.path.join(version_dir, 'dates.npy'), mmap_mode='r'),
+        'closes': np.load(os.path.join(version_dir, 'closes.npy'), mmap_mode='r'),
+        'index': index,
+    }
+    return _archive
+
+
+def get_closes(symbol, until=None):
+    """Returns (dates, closes) arrays for a symbol, optionally up to `until`."""
+    archive = load_archive()
+    if not archive or symbol not in archive['index']:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype='float64')
+
+    start, stop = archive['index'][symbol]
+    dates = archive['dates'][start:stop]
+    closes = archive['closes'][start:stop]
+    if until is not None:
+        stop = np.searchsorted(dates, np.datetime64(until, 'D'), side='right')
+        dates, closes = dates[:stop], closes[:stop]
+    return dates, closes
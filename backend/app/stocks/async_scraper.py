@@ -0,0 +1,89 @@
+import asyncio
+import time
+from datetime import datetime
+import httpx
+from .company_page import extract_company_page
+from .http_client import USER_AGENT
+from .scraper import (
+    company_page_url, historical_url, latest_prices_url, market_home_url,
+    parse_historical_html, parse_latest_prices, parse_market_indices
+)
+
+# asyncio counterpart of scraper.py for bulk work (history backfills, the
+# price poller). It shares the URL builders and parse_* functions, caps
+# in-flight requests with a semaphore and spaces request starts by at least
+# 1 / rate seconds so dsebd.org sees a steady, polite load. Parsing is
+# CPU-bound, so it runs in a worker thread to keep the event loop free.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncScraper:
+    def __init__(self, concurrency=4, rate=4.0, timeout=15, retries=3, backoff=0.5):
+        self.concurrency = concurrency
+        self.min_interval = 1.0 / rate if rate else 0
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._client = None
+        self._semaphore = None
+        self._rate_lock = None
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._rate_lock = asyncio.Lock()
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            headers={'User-Agent': USER_AGENT},
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            follow_redirects=True
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+
+    async def _wait_for_slot(self):
+        async with self._rate_lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.min_interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def fetch(self, url):
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                await self._wait_for_slot()
+                try:
+                    response = await self._client.get(url)
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        response.raise_for_status()
+                        return response.text
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def _parse(self, parser, html):
+        return await asyncio.to_thread(parser, html)
+
+    async def historical(self, symbol, start_date, end_date):
+        html = await self.fetch(historical_url(symbol, start_date, end_date))
+        return await self._parse(parse_historical_html, html)
+
+    async def company_details(self, symbol):
+        details = await self._parse(extract_company_page, await self.fetch(company_page_url(symbol)))
+        if details:
+            details["last_updated"] = datetime.utcnow()
+        return details or None
+
+    async def latest_prices(self):
+        return await self._parse(parse_latest_prices, await self.fetch(latest_prices_url()))
+
+    async def market_indices(self):
+        return await self._parse(parse_market_indices, await self.fetch(market_home_url()))
+
+    async def gather(self, coros):
+        """Runs coroutines concurrently; failures come back as exceptions, not raised."""
+        return await asyncio.gather(*coros, return_exceptions=True)
@@ -0,0 +1,160 @@
+from lxml import html as lxml_html
+
+# Declarative extraction of DSE's displayCompany.php page. The page is parsed
+# once with lxml and every table row is visited once; each key/value cell
+# pair is matched against FIELD_MAP, and the first row matching an entry
+# fills its fields.
+
+
+def _clean(text):
+    return ' '.join(text.split())
+
+
+def _number(value):
+    return float(value.replace(',', '').replace('Tk.', '').replace('৳', '').strip())
+
+
+def _integer(value):
+    return int(value.replace(',', '').strip())
+
+
+def _range(value):
+    low, high = value.split('-')
+    return _number(low), _number(high)
+
+
+def _change(value):
+    # "Change*" holds the absolute change and, optionally, the percentage.
+    parts = value.split()
+    change = _number(parts[0])
+    if len(parts) >= 2:
+        return change, float(parts[1].replace('%', ''))
+    return (change,)
+
+
+def _percent(value):
+    if '%' not in value:
+        raise ValueError(value)
+    return float(value.split('%')[0].strip())
+
+
+def _text(value):
+    return value
+
+
+# (fields, key patterns, parser, excluded key patterns). Patterns match
+# case-insensitively anywhere in the key cell; a pattern wrapped in '='
+# must match the whole key. A parser for several fields returns a tuple.
+FIELD_MAP = [
+    (('ltp',), ("Last Trading Price",), _number, ()),
+    (('open',), ("Opening Price", "Open Price"), _number, ("Adjusted",)),
+    (('low', 'high'), ("Day's Range", "Day Range"), _range, ()),
+    (('day_range',), ("Day's Range", "Day Range"), _text, ()),
+    (('week_52_low', 'week_52_high'), ("52 Weeks' Moving Range", "52 Week"), _range, ()),
+    (('volume',), ("Day's Volume",), _number, ()),
+    (('trade',), ("Day's Trade",), _integer, ()),
+    (('value',), ("Day's Value",), _number, ()),
+    (('market_cap',), ("Market Capitalization", "Market Cap"), _number, ()),
+    (('change', 'percent_change'), ("=Change*=",), _change, ()),
+    (('ycp',), ("Yesterday's Closing Price",), _number, ()),
+    (('sector',), ("Sector",), _text, ()),
+    (('face_value',), ("Face/Par Value", "Face Value"), _number, ()),
+    (('market_lot',), ("Market Lot",), _integer, ()),
+    (('category',), ("Category",), _text, ("Market Category",)),
+    (('market_category',), ("Market Category",), _text, ()),
+    (('authorized_capital',), ("Authorized Capital",), _text, ()),
+    (('paid_up_capital',), ("Paid-up Capital",), _text, ()),
+    (('outstanding_shares',), ("Total Number of Securities", "Outstanding Securities"), _text, ()),
+    (('listing_year',), ("Listing Year",), _text, ()),
+    (('share_holding',), ("Share Holding Percentage",), _text, ()),
+    (('dividend_yield',), ("Cash Dividend",), _percent, ()),
+]
+
+# Figures read from the last row of a financial table instead of key/value
+# pairs: (index among the bordered tables, cell slice, field). The first
+# non-zero number in the slice is taken.
+LAST_ROW_FIELDS = [
+    (6, slice(1, 6), 'eps_basic'),
+    (6, slice(6, 10), 'nav_original'),
+    (7, slice(1, 4), 'pe_basic'),
+]
+
+BORDERED_TABLE_CLASS = 'table table-bordered background-white'
+# The page heading reads "Company Name: <i>Grameenphone Ltd.</i>".
+COMPANY_NAME_PREFIX = 'Company Name:'
+
+_last_row_rules = {}
+for _index, _cells, _field in LAST_ROW_FIELDS:
+    _last_row_rules.setdefault(_index, []).append((_cells, _field))
+
+_compiled = [
+    (fields,
+     tuple(p.lower() for p in patterns if not p.startswith('=')),
+     tuple(p.strip('=').lower() for p in patterns if p.startswith('=')),
+     parser,
+     tuple(e.lower() for e in excluded))
+    for fields, patterns, parser, excluded in FIELD_MAP
+]
+
+
+def _apply_pair(data, key, value):
+    lowered = key.lower()
+    for fields, contains, exact, parser, excluded in _compiled:
+        if fields[0] in data:
+            continue
+        if not (lowered in exact or any(p in lowered for p in contains)):
+            continue
+        if any(e in lowered for e in excluded):
+            continue
+        try:
+            parsed = parser(value)
+        except (ValueError, IndexError):
+            continue
+        if len(fields) == 1:
+            data[fields[0]] = parsed
+        else:
+            data.update(zip(fields, parsed))
+
+
+def _first_nonzero(cells):
+    for cell in cells:
+        try:
+            value = _number(cell)
+        except ValueError:
+            continue
+        if value != 0:
+            return value
+    return None
+
+
+def extract_company_page(page_html):
+    """Extracts every known field from a displayCompany.php page in one pass."""
+    doc = lxml_html.fromstring(page_html)
+    data = {}
+
+    for heading in doc.iter('h2'):
+        text = _clean(heading.text_content())
+        if text.startswith(COMPANY_NAME_PREFIX) and text[len(COMPANY_NAME_PREFIX):].strip():
+            data['company_name'] = text[len(COMPANY_NAME_PREFIX):].strip()
+            break
+
+    bordered_index = -1
+    for table in doc.iter('table'):
+        if table.get('class') == BORDERED_TABLE_CLASS:
+            bordered_index += 1
+        row = None
+        # Only this table's own rows; nested tables are visited on their own.
+        for row in table.xpath('./tr|./thead/tr|./tbody/tr'):
+            cells = [_clean(c.text_content()) for c in row if c.tag in ('td', 'th')]
+            if len(cells) >= 2:
+                _apply_pair(data, cells[0], cells[1])
+            if len(cells) >= 4:
+                _apply_pair(data, cells[2], cells[3])
+
+        if table.get('class') == BORDERED_TABLE_CLASS and row is not None:
+            last_cells = [_clean(c.text_content()) for c in row if c.tag == 'td']
+            for cell_slice, field in _last_row_rules.get(bordered_index, []):
+                value = _first_nonzero(last_cells[cell_slice])
+                if field not in data and value is not None:
+                    data[field] = value
+    return data
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from .http_client import MAX_PER_HOST
+from .scraper import scrape_company_details
+
+# Bulk refresh of company fundamentals for every listed symbol, so detail
+# pages are served from Mongo instead of scraping on the first visit. The
+# HTTP client already caps concurrent requests per host; one thread per
+# slot keeps them busy without threads timing out while waiting for one.
+DETAILS_MAX_AGE = timedelta(hours=20)
+WRITE_BATCH = 50
+
+
+def stale_symbols(db, max_age=DETAILS_MAX_AGE, now=None):
+    cutoff = (now or datetime.utcnow()) - max_age
+    cursor = db.stocks.find(
+        {"$or": [
+            {"details_updated_at": {"$lt": cutoff}},
+            {"details_updated_at": {"$exists": False}},
+            {"details_updated_at": {"$type": "string"}}
+        ]},
+        {"symbol": 1, "_id": 0}
+    )
+    return sorted(doc["symbol"] for doc in cursor)
+
+
+def refresh_company_details(db, symbols, workers=MAX_PER_HOST, log=print):
+    """Scrapes details for symbols concurrently and bulk-writes them to stocks."""
+    started = time.perf_counter()
+    stats = {"symbols": len(symbols), "updated": 0, "failed": 0}
+    pending = []
+
+    def flush():
+        if pending:
+            result = db.stocks.bulk_write(pending, ordered=False)
+            stats["updated"] += result.modified_count
+            pending.clear()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='details') as pool:
+        futures = {pool.submit(scrape_company_details, symbol): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            details = future.result()
+            if not details:
+                stats["failed"] += 1
+                log(f"{symbol}: no details")
+                continue
+            details["details_updated_at"] = datetime.utcnow()
+            pending.append(UpdateOne({"symbol": symbol}, {"$set": details}))
+            if len(pending) >= WRITE_BATCH:
+                flush()
+    flush()
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    return stats
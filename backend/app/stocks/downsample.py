@@ -0,0 +1,92 @@
+import numpy as np
+
+# Server-side thinning of long history ranges before they are serialized.
+# Bars are the dicts get_history returns (date, open, high, low, close,
+# volume); dates may be 'YYYY-MM-DD' or, for the live bar, a full ISO
+# timestamp, so only the first ten characters are used for bucketing.
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+MIN_POINTS = 3
+
+
+def _columns(bars):
+    return {f: np.array([bar.get(f, 0) or 0 for bar in bars], dtype=float) for f in FIELDS}
+
+
+def _bucket_keys(dates, resolution):
+    days = np.array([d[:10] for d in dates], dtype='datetime64[D]')
+    if resolution == 'monthly':
+        return days.astype('datetime64[M]').astype(int)
+    # 1970-01-01 was a Thursday; shift so weeks start on Sunday, the first
+    # DSE trading day.
+    return (days.astype(int) + 4) // 7
+
+
+def resample(bars, resolution):
+    """Aggregates daily bars into weekly or monthly OHLCV bars."""
+    if resolution == 'daily' or len(bars) < 2:
+        return bars
+
+    keys = _bucket_keys([bar['date'] for bar in bars], resolution)
+    # Bars arrive sorted by date, so each bucket is a contiguous run.
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+    cols = _columns(bars)
+
+    opens = cols['open'][starts]
+    highs = np.maximum.reduceat(cols['high'], starts)
+    lows = np.minimum.reduceat(cols['low'], starts)
+    closes = cols['close'][ends]
+    volumes = np.add.reduceat(cols['volume'], starts)
+
+    return [
+        {"date": bars[s]['date'], "open": float(o), "high": float(h), "low": float(l),
+         "close": float(c), "volume": float(v)}
+        for s, o, h, l, c, v in zip(starts, opens, highs, lows, closes, volumes)
+    ]
+
+
+def lttb_indices(values, max_points):
+    """Largest-Triangle-Three-Buckets: indices of max_points samples that keep the shape."""
+    n = len(values)
+    if max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    y = np.asarray(values, dtype=float)
+    # Interior points are split into max_points - 2 buckets; the first and
+    # last points are always kept.
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Twice the triangle area for every candidate in the bucket at once.
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(bars, max_points):
+    """Keeps at most max_points bars chosen by LTTB over the closing price."""
+    if not max_points or len(bars) <= max_points:
+        return bars
+    closes = _columns(bars)['close']
+    return [bars[i] for i in lttb_indices(closes, max_points)]
+
+
+def to_columns(bars):
+    """Columnar shape: one array per field instead of one object per bar."""
+    return {
+        "date": [bar['date'] for bar in bars],
+        **{f: [bar.get(f) for bar in bars] for f in FIELDS}
+    }
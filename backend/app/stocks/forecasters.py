@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Every forecaster takes (symbol, historical_data_list, prediction_days,
+# allow_train, db) and returns (actual_history, prediction_data, trend) in the
+# shape the prediction endpoint serves. The "fast" tiers below are plain
+# NumPy and fit per request in milliseconds; the LSTM tier imports
+# TensorFlow only when it is first selected.
+MAX_PREDICTION_DAYS = 90
+MIN_FAST_ROWS = 30
+
+FORECASTERS = {}
+
+
+def register(name):
+    def decorator(fn):
+        FORECASTERS[name] = fn
+        return fn
+    return decorator
+
+
+def get_forecaster(name):
+    return FORECASTERS.get(name)
+
+
+def _load_closes(historical_data_list):
+    df = pd.DataFrame(historical_data_list)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.drop_duplicates(subset=['date'], keep='last').sort_values('date')
+    return df['date'], df['close'].to_numpy(dtype='float64')
+
+
+def build_result(dates, closes, fitted, future, warmup):
+    """
+    Formats a forecast like the LSTM endpoint: the first warmup days are the
+    actual closes, then in-sample fitted values, then the future values.
+    Returns: (actual_history, prediction_data, trend)
+    """
+    date_strs = dates.dt.strftime('%Y-%m-%d').tolist()
+    future_dates = dates.iloc[-1] + pd.to_timedelta(np.arange(1, len(future) + 1), unit='D')
+    series_dates = date_strs + future_dates.strftime('%Y-%m-%d').tolist()
+    series_values = np.concatenate([closes[:warmup], fitted, future]).tolist()
+
+    prediction_series = [{"date": d, "value": v} for d, v in zip(series_dates, series_values)]
+    trend = 'upward' if future[0] > closes[-1] else 'downward'
+    actual_history = [{"date": d, "close": c} for d, c in zip(date_strs, closes.tolist())]
+    return actual_history, prediction_series, trend
+
+
+@register('ridge')
+def ridge_forecast(symbol, historical_data_list, prediction_days=7, allow_train=True, db=None, lags=10, alpha=1.0):
+    """Ridge regression of the next daily return on the previous lags returns."""
+    if not historical_data_list or len(historical_data_list) < max(MIN_FAST_ROWS, lags + 2):
+        return None, None, None
+
+    dates, closes = _load_closes(historical_data_list)
+    returns = np.diff(closes) / closes[:-1]
+
+    X = sliding_window_view(returns[:-1], lags)
+    y = returns[lags:]
+    x_mean, y_mean = X.mean(axis=0), y.mean()
+    Xc = X - x_mean
+    weights = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(lags), Xc.T @ (y - y_mean))
+    intercept = y_mean - x_mean @ weights
+
+    # closes[lags + 1:] are the days with a full window of prior returns.
+    fitted = closes[lags:-1] * (1 + X @ weights + intercept)
+
+    window = returns[-lags:].copy()
+    future = np.empty(prediction_days)
+    last = closes[-1]
+    for i in range(prediction_days):
+        r = window @ weights + intercept
+        last = last * (1 + r)
+        future[i] = last
+        window = np.roll(window, -1)
+        window[-1] = r
+
+    return build_result(dates, closes, fitted, future, warmup=lags + 1)
+
+
+@register('ets')
+def ets_forecast(symbol, historical_data_list, prediction_days=7, allow_train=True, db=None):
+    """Holt's linear exponential smoothing, with (alpha, beta) picked by one-step error."""
+    if not historical_data_list or len(historical_data_list) < MIN_FAST_ROWS:
+        return None, None, None
+
+    dates, closes = _load_closes(historical_data_list)
+
+    def smooth(alpha, beta):
+        level, trend = closes[0], closes[1] - closes[0]
+        fitted = np.empty(len(closes) - 1)
+        for i, value in enumerate(closes[1:]):
+            fitted[i] = level + trend
+            prev_level = level
+            level = alpha * value + (1 - alpha) * (level + trend)
+            trend = beta * (level - prev_level) + (1 - beta) * trend
+        return fitted, level, trend
+
+    best = None
+    for alpha in (0.2, 0.4, 0.6, 0.8, 0.95):
+        for beta in (0.01, 0.05, 0.1, 0.2):
+            fitted, level, trend = smooth(alpha, beta)
+            sse = float(np.sum((closes[1:] - fitted) ** 2))
+            if best is None or sse < best[0]:
+                best = (sse, fitted, level, trend)
+
+    _, fitted, level, trend = best
+    future = level + trend * np.arange(1, prediction_days + 1)
+    return build_result(dates, closes, fitted, future, warmup=1)
+
+
+@register('lstm')
+def lstm_forecast(symbol, historical_data_list, prediction_days=7, allow_train=True, db=None):
+    from .ml_logic import get_lstm_prediction
+    return get_lstm_prediction(
+        symbol, historical_data_list, prediction_days=prediction_days, allow_train=allow_train, db=db
+    )
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, UpdateOne
+
+# Daily OHLCV bars live in `daily_bars` (one document per symbol/date) and
+# `history_sync` records the day range each symbol has been pulled for from
+# the DSE day-end archive (covered_from..synced_through). A request for a
+# longer range or a newer day fetches only the days outside that range.
+MAX_HISTORY_DAYS = 730
+SYNC_INTERVAL = timedelta(hours=1)
+
+_indexes_ready = False
+
+
+def ensure_history_indexes(db):
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    db.daily_bars.create_index([("symbol", ASCENDING), ("date", ASCENDING)], unique=True)
+    db.history_sync.create_index("symbol", unique=True)
+    _indexes_ready = True
+
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+
+
+def store_bars(db, symbol, bars):
+    """Upserts scraped bars; re-storing the same day simply overwrites it."""
+    ops = []
+    for bar in bars:
+        try:
+            day = _to_day(bar["date"])
+        except (KeyError, ValueError):
+            continue
+        doc = {k: bar[k] for k in ("open", "high", "low", "close", "volume") if k in bar}
+        ops.append(UpdateOne({"symbol": symbol, "date": day}, {"$set": doc}, upsert=True))
+    if not ops:
+        return 0
+    result = db.daily_bars.bulk_write(ops, ordered=False)
+    return result.upserted_count + result.modified_count
+
+
+def _first_bar_day(db, symbol):
+    bar = db.daily_bars.find_one({"symbol": symbol}, {"date": 1}, sort=[("date", ASCENDING)])
+    return bar["date"] if bar else None
+
+
+def missing_ranges(db, symbol, start, now):
+    """Returns the (first day, last day) ranges between start and now not yet fetched."""
+    ensure_history_indexes(db)
+    start, today = _to_day(start), _to_day(now)
+    state = db.history_sync.find_one({"symbol": symbol}) or {}
+    covered_to = state.get("synced_through")
+    if covered_to is None:
+        return [(start, today)]
+
+    covered_from = state.get("covered_from")
+    if covered_from is None:
+        # Synced before ranges were tracked: the stored bars mark the start.
+        covered_from = _first_bar_day(db, symbol) or covered_to
+        db.history_sync.update_one({"symbol": symbol}, {"$set": {"covered_from": covered_from}})
+
+    gaps = []
+    if start < covered_from:
+        gaps.append((start, covered_from - timedelta(days=1)))
+    # Re-request the last synced day too; it may have been a partial bar.
+    if now - state["synced_at"] >= SYNC_INTERVAL:
+        gaps.append((covered_to, today))
+    return gaps
+
+
+def record_range(db, symbol, first_day, last_day, bars, now):
+    """Stores the bars fetched for a range and widens the symbol's covered range."""
+    written = store_bars(db, symbol, bars)
+
+    # The fetch succeeded, so an empty answer means no trading in the range.
+    update = {
+        "$min": {"covered_from": _to_day(first_day)},
+        "$max": {"synced_through": _to_day(last_day)}
+    }
+    if _to_day(last_day) >= _to_day(now):
+        update["$set"] = {"synced_at": now}
+    db.history_sync.update_one({"symbol": symbol}, update, upsert=True)
+    return written
+
+
+def sync_history(db, symbol, start, now=None):
+    """Fetches only the days between start and now that the store is missing."""
+    from .scraper import fetch_historical_range
+    now = now or datetime.utcnow()
+    written = 0
+    for first_day, last_day in missing_ranges(db, symbol, start, now):
+        bars = fetch_historical_range(symbol, first_day, last_day)
+        written += record_range(db, symbol, first_day, last_day, bars, now)
+    return written
+
+
+def get_history(db, symbol, days=365, now=None):
+    """Returns up to `days` of daily bars for a symbol from the local store."""
+    days = min(days, MAX_HISTORY_DAYS)
+    now = now or datetime.utcnow()
+    start = _to_day(now - timedelta(days=days))
+    try:
+        sync_history(db, symbol, start, now)
+    except Exception as e:
+        print(f"Error syncing history for {symbol}: {e}")
+
+    cursor = db.daily_bars.find(
+        {"symbol": symbol, "date": {"$gte": start}},
+        {"_id": 0, "symbol": 0}
+    ).sort("date", ASCENDING)
+
+    history = []
+    for bar in cursor:
+        bar["date"] = bar["date"].strftime("%Y-%m-%d")
+        history.append(bar)
+    return history
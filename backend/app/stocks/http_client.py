@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One keep-alive session per process for every request to dsebd.org, with
+# bounded retries on connection errors and 429/5xx answers.
+DEFAULT_TIMEOUT = 15
+USER_AGENT = 'Mozilla/5.0 (compatible; ShaplaStreet/1.0)'
+# Pages whose last response carried an ETag/Last-Modified are kept so a
+# repeat fetch can be answered by a 304.
+MAX_CONDITIONAL_ENTRIES = 64
+# Upper bound on in-flight requests per host from this process, however many
+# threads are scraping.
+MAX_PER_HOST = int(os.environ.get('DSE_MAX_CONCURRENCY', 4))
+# How long a caller waits for one of those slots. Request threads share
+# them with the scrapers, so a slow dsebd.org must not queue them unbounded.
+SLOT_WAIT_SECONDS = float(os.environ.get('DSE_SLOT_WAIT_SECONDS', 5))
+
+_session = None
+_session_lock = threading.Lock()
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+_host_slots = {}
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    respect_retry_after_header=True
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                _session = session
+    return _session
+
+
+class HostBusy(requests.exceptions.Timeout):
+    """Every request slot for the host stayed taken for SLOT_WAIT_SECONDS."""
+
+
+def _host_slot(url):
+    host = (urlsplit(url).hostname or '').removeprefix('www.')
+    with _session_lock:
+        return _host_slots.setdefault(host, threading.BoundedSemaphore(MAX_PER_HOST))
+
+
+def fetch(url, timeout=DEFAULT_TIMEOUT, conditional=False):
+    """
+    GETs url through the shared session and returns the body text. With
+    conditional=True the previous ETag/Last-Modified are sent and a 304
+    returns the previously fetched body. Raises requests exceptions on
+    network errors, non-2xx answers and no free host slot (HostBusy).
+    """
+    headers = {}
+    with _validators_lock:
+        cached = _validators.get(url) if conditional else None
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    slot = _host_slot(url)
+    if not slot.acquire(timeout=SLOT_WAIT_SECONDS):
+        raise HostBusy(f"No free request slot for {urlsplit(url).hostname} after {SLOT_WAIT_SECONDS}s")
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout)
+    finally:
+        slot.release()
+    if cached and response.status_code == 304:
+        return cached[2]
+    response.raise_for_status()
+
+    if conditional:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with _validators_lock:
+                _validators[url] = (etag, last_modified, response.text)
+                _validators.move_to_end(url)
+                while len(_validators) > MAX_CONDITIONAL_ENTRIES:
+                    _validators.popitem(last=False)
+    return response.text
@@ -0,0 +1,50 @@
+import time
+from pymongo import UpdateOne
+
+# Shared write path for scraped stock rows, used by the price refresh and by
+# scripts/ingest.py. Rows are compared against what is already stored and
+# only the changed ones are sent, as one unordered bulk write.
+IGNORED_FIELDS = ('updated_at',)
+
+
+def _changed(existing, doc, ignored):
+    if existing is None:
+        return True
+    return any(existing.get(k) != v for k, v in doc.items() if k not in ignored)
+
+
+def bulk_upsert(collection, docs, key='symbol', ignored=IGNORED_FIELDS):
+    """
+    Upserts docs by key, skipping documents whose fields (other than ignored
+    ones) already match. Returns a dict of write counts and timings.
+    """
+    started = time.perf_counter()
+    stats = {"received": len(docs), "unchanged": 0, "upserted": 0, "modified": 0,
+             "read_ms": 0.0, "write_ms": 0.0}
+    if not docs:
+        return stats
+
+    keys = [doc[key] for doc in docs]
+    fields = {k: 1 for doc in docs for k in doc}
+    existing = {d[key]: d for d in collection.find({key: {"$in": keys}}, fields)}
+    read_done = time.perf_counter()
+    stats["read_ms"] = round((read_done - started) * 1000, 1)
+
+    ops = []
+    for doc in docs:
+        if _changed(existing.get(doc[key]), doc, ignored):
+            ops.append(UpdateOne({key: doc[key]}, {"$set": doc}, upsert=True))
+        else:
+            stats["unchanged"] += 1
+
+    if ops:
+        result = collection.bulk_write(ops, ordered=False)
+        stats["upserted"] = result.upserted_count
+        stats["modified"] = result.modified_count
+    stats["write_ms"] = round((time.perf_counter() - read_done) * 1000, 1)
+    return stats
+
+
+def format_stats(stats):
+    return (f"{stats['received']} rows: {stats['upserted']} upserted, {stats['modified']} modified, "
+            f"{stats['unchanged']} unchanged (read {stats['read_ms']} ms, write {stats['write_ms']} ms)")
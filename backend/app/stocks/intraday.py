@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+# Intraday minute bars built from the poller's latest-price snapshots. Each
+# symbol and trading day is one `intraday_bars` document holding parallel
+# arrays, one entry per minute with a trade:
+#   {symbol, day: 'YYYY-MM-DD', count, cum_volume,
+#    minutes: [615, 616, ...], open: [...], high: [...], low: [...],
+#    close: [...], volume: [...]}
+# `minutes` counts from midnight DSE time; `cum_volume` is the day's
+# cumulative volume at the last snapshot, so each bar gets the difference.
+INTERVALS = (1, 5)
+
+_indexes_ready = False
+
+
+def ensure_intraday_indexes(db):
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    db.intraday_bars.create_index([("symbol", ASCENDING), ("day", ASCENDING)], unique=True)
+    _indexes_ready = True
+
+
+def record_snapshot(db, rows, now, tz):
+    """Folds one snapshot of latest-price rows into the current minute's bars."""
+    if not rows:
+        return 0
+    ensure_intraday_indexes(db)
+    local = now.replace(tzinfo=timezone.utc).astimezone(tz)
+    day = local.strftime("%Y-%m-%d")
+    minute = local.hour * 60 + local.minute
+
+    symbols = [row["symbol"] for row in rows]
+    existing = {
+        doc["symbol"]: doc for doc in db.intraday_bars.find(
+            {"day": day, "symbol": {"$in": symbols}},
+            {"symbol": 1, "count": 1, "cum_volume": 1, "minutes": {"$slice": -1},
+             "high": {"$slice": -1}, "low": {"$slice": -1}}
+        )
+    }
+
+    ops = []
+    for row in rows:
+        price = row.get("ltp")
+        if not price:
+            continue
+        doc = existing.get(row["symbol"])
+        cum_volume = row.get("volume") or 0
+        traded = max(cum_volume - (doc["cum_volume"] if doc else 0), 0)
+        key = {"symbol": row["symbol"], "day": day}
+
+        if doc and doc["minutes"] and doc["minutes"][-1] == minute:
+            i = doc["count"] - 1
+            ops.append(UpdateOne(key, {
+                "$inc": {f"volume.{i}": traded},
+                "$set": {f"high.{i}": max(doc["high"][-1], price), f"low.{i}": min(doc["low"][-1], price),
+                         f"close.{i}": price, "cum_volume": cum_volume}
+            }))
+        else:
+            ops.append(UpdateOne(key, {
+                "$push": {"minutes": minute, "open": price, "high": price,
+                          "low": price, "close": price, "volume": traded},
+                "$inc": {"count": 1},
+                "$set": {"cum_volume": cum_volume}
+            }, upsert=True))
+
+    if ops:
+        db.intraday_bars.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def latest_day(db, symbol):
+    doc = db.intraday_bars.find_one({"symbol": symbol}, {"day": 1}, sort=[("day", DESCENDING)])
+    return doc["day"] if doc else None
+
+
+def get_intraday(db, symbol, tz, day=None, interval=1):
+    """Returns a day's bars (the latest recorded day by default) at 1 or 5 minutes."""
+    import numpy as np
+    day = day or latest_day(db, symbol)
+    if not day:
+        return []
+    doc = db.intraday_bars.find_one({"symbol": symbol, "day": day})
+    if not doc or not doc.get("count"):
+        return []
+
+    minutes = np.array(doc["minutes"])
+    opens, highs, lows = np.array(doc["open"]), np.array(doc["high"]), np.array(doc["low"])
+    closes, volumes = np.array(doc["close"]), np.array(doc["volume"])
+    if interval > 1:
+        buckets = minutes // interval
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(minutes)] - 1
+        minutes = buckets[starts] * interval
+        opens, closes = opens[starts], closes[ends]
+        highs = np.maximum.reduceat(highs, starts)
+        lows = np.minimum.reduceat(lows, starts)
+        volumes = np.add.reduceat(volumes, starts)
+
+    base = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=tz)
+    return [
+        {"date": base.replace(hour=int(m) // 60, minute=int(m) % 60).isoformat(),
+         "open": float(o), "high": float(h), "low": float(l), "close": float(c), "volume": float(v)}
+        for m, o, h, l, c, v in zip(minutes, opens, highs, lows, closes, volumes)
+    ]
@@ -0,0 +1,119 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from ..db import mongo
+
+# Prediction jobs are recorded in `prediction_jobs` so any gunicorn worker can
+# answer a status poll, while the work itself runs on a small thread pool in
+# the worker that accepted the job. A job is "active" while queued or
+# running; a partial unique index allows one active job per symbol, horizon
+# and model, which is how concurrent requests for the same forecast get coalesced.
+JOB_WORKERS = int(os.environ.get('PREDICTION_JOB_WORKERS', 1))
+JOB_TIMEOUT = timedelta(minutes=int(os.environ.get('PREDICTION_JOB_TIMEOUT_MINUTES', 15)))
+JOB_RETENTION_SECONDS = 24 * 3600
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='prediction-job')
+_indexes_ready = False
+
+
+def ensure_job_indexes(db):
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    db.prediction_jobs.create_index(
+        [("symbol", ASCENDING), ("days", ASCENDING), ("model", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"active": True},
+        name="one_active_job_per_forecast"
+    )
+    db.prediction_jobs.create_index("created_at", expireAfterSeconds=JOB_RETENTION_SECONDS)
+    _indexes_ready = True
+
+
+def _expire_stuck_jobs(db, symbol, now):
+    # A job whose worker died would otherwise block its symbol forever.
+    db.prediction_jobs.update_many(
+        {"symbol": symbol, "active": True, "updated_at": {"$lt": now - JOB_TIMEOUT}},
+        {"$set": {"status": "failed", "error": "Job timed out", "updated_at": now},
+         "$unset": {"active": ""}}
+    )
+
+
+def submit_prediction(app, symbol, allow_train=True, prediction_days=7, model='lstm'):
+    """Returns the active job for this forecast, enqueueing a new one if needed."""
+    db = mongo.db
+    ensure_job_indexes(db)
+    now = datetime.utcnow()
+    _expire_stuck_jobs(db, symbol, now)
+
+    key = {"symbol": symbol, "days": prediction_days, "model": model}
+    token = uuid.uuid4().hex
+    try:
+        job = db.prediction_jobs.find_one_and_update(
+            {**key, "active": True},
+            {"$setOnInsert": {
+                "status": "queued",
+                "token": token,
+                "created_at": now,
+                "updated_at": now
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another worker inserted the job between our lookup and insert. A
+        # fast model may already have finished it, so "active" is not
+        # required; the newest job for the forecast is the one it made.
+        job = db.prediction_jobs.find_one(key, sort=[("created_at", -1)])
+
+    if job and job.get("token") == token:
+        _executor.submit(_run_job, app, job["_id"], key, allow_train)
+    return job
+
+
+def _run_job(app, job_id, key, allow_train):
+    from .prediction import run_prediction
+
+    with app.app_context():
+        jobs = mongo.db.prediction_jobs
+        jobs.update_one({"_id": job_id}, {"$set": {"status": "running", "updated_at": datetime.utcnow()}})
+        try:
+            payload, error = run_prediction(
+                mongo.db, key["symbol"], allow_train=allow_train,
+                prediction_days=key["days"], model=key["model"]
+            )
+            update = {"status": "failed", "error": error} if error else {"status": "done", "result": payload}
+        except Exception as e:
+            print(f"Prediction job error for {key['symbol']}: {e}")
+            update = {"status": "failed", "error": str(e)}
+        update["updated_at"] = datetime.utcnow()
+        jobs.update_one({"_id": job_id}, {"$set": update, "$unset": {"active": ""}})
+
+
+def get_job(job_id):
+    try:
+        oid = ObjectId(job_id)
+    except Exception:
+        return None
+    return mongo.db.prediction_jobs.find_one({"_id": oid}, {"token": 0, "active": 0})
+
+
+def serialize_job(job):
+    data = {
+        "job_id": str(job["_id"]),
+        "symbol": job["symbol"],
+        "days": job["days"],
+        "model": job["model"],
+        "status": job["status"],
+        "created_at": job["created_at"].isoformat(),
+        "updated_at": job["updated_at"].isoformat()
+    }
+    if "result" in job:
+        data["result"] = job["result"]
+    if "error" in job:
+        data["error"] = job["error"]
+    return data
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+from ..cache import acquire_lease, release_lease
+from .ingest import bulk_upsert, format_stats
+from .intraday import record_snapshot
+from .price_stream import diff_snapshots, record_changes
+
+# Shared refresh steps for the market-wide caches. They are run by
+# scripts/poll_market.py on a schedule, and inline by the request handlers
+# only when no poller is deployed (MARKET_POLLER_ENABLED unset).
+DSE_TZ = timezone(timedelta(hours=6))
+TRADING_DAYS = {6, 0, 1, 2, 3}  # Sunday to Thursday
+# The session runs 10:00-14:30; polling starts a little early and runs on
+# past the close so the final prices are captured.
+POLL_WINDOW = ((9, 45), (15, 0))
+
+
+def is_trading_hours(now=None):
+    now = (now or datetime.now(timezone.utc)).astimezone(DSE_TZ)
+    if now.weekday() not in TRADING_DAYS:
+        return False
+    (start_h, start_m), (end_h, end_m) = POLL_WINDOW
+    minutes = now.hour * 60 + now.minute
+    return start_h * 60 + start_m <= minutes <= end_h * 60 + end_m
+
+
+def last_session_day(now=None):
+    """The DSE date ('YYYY-MM-DD') of the current or most recent trading session."""
+    now = (now or datetime.now(timezone.utc)).astimezone(DSE_TZ)
+    start_h, start_m = POLL_WINDOW[0]
+    day = now.date()
+    if now.hour * 60 + now.minute < start_h * 60 + start_m:
+        day -= timedelta(days=1)
+    # Weekends only; on an exchange holiday no bars exist for the day.
+    while day.weekday() not in TRADING_DAYS:
+        day -= timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+def refresh_latest_prices(db, latest_prices=None):
+    if latest_prices is None:
+        from .scraper import scrape_latest_prices
+        latest_prices = scrape_latest_prices()
+
+    if latest_prices:
+        now = datetime.utcnow()
+        previous = db.latest_prices_cache.find_one({"type": "all_prices"}, {"data": 1})
+        previous_rows = previous["data"] if previous else None
+        changes = diff_snapshots(previous_rows, latest_prices)
+
+        # The snapshot is the next refresh's diff baseline, so `stocks` is
+        # written first: if that write raises, the snapshot keeps the old
+        # rows and the same changes are found and retried next time.
+        changed_rows = [row for row in latest_prices if row["symbol"] in changes]
+        stats = bulk_upsert(db.stocks, changed_rows)
+        print(f"Latest prices: {len(changes)} of {len(latest_prices)} symbols changed; {format_stats(stats)}")
+
+        # Outside trading hours nothing moves: only the timestamp is touched.
+        update = {"updated_at": now}
+        if changes or previous_rows is None or len(previous_rows) != len(latest_prices):
+            update["data"] = latest_prices
+        db.latest_prices_cache.update_one({"type": "all_prices"}, {"$set": update}, upsert=True)
+        # Recorded after the snapshot is stored, so a stream client that
+        # reads the snapshot on connect never misses a later change.
+        record_changes(db, changes, now)
+
+        if changed_rows and is_trading_hours(now.replace(tzinfo=timezone.utc)):
+            record_snapshot(db, changed_rows, now, DSE_TZ)
+
+    return latest_prices
+
+
+def refresh_indices(db, indices=None):
+    if indices is None:
+        from .scraper import scrape_market_indices
+        indices = scrape_market_indices()
+
+    if indices:
+        db.indices_cache.update_one(
+            {"type": "market_indices"},
+            {"$set": {
+                "data": indices,
+                "updated_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    return indices
+
+
+# name -> (cache collection, document type, max age in seconds, refresh step)
+FEEDS = {
+    'latest_prices': ('latest_prices_cache', 'all_prices', 300, refresh_latest_prices),
+    'indices': ('indices_cache', 'market_indices', 120, refresh_indices),
+}
+REFRESH_LEASE_SECONDS = 60
+
+
+class FeedUnavailable(Exception):
+    """A feed has no cached data yet and another worker is fetching it."""
+
+
+def cache_age(cache, now=None):
+    """Age of a cache document in seconds, or None if it has no timestamp."""
+    if not cache or 'updated_at' not in cache:
+        return None
+    cache_time = cache['updated_at']
+    if isinstance(cache_time, str):
+        cache_time = datetime.fromisoformat(cache_time)
+    return ((now or datetime.utcnow()) - cache_time).total_seconds()
+
+
+def load_feed(db, name, allow_refresh=True):
+    """
+    Returns a feed's data from its Mongo cache, refreshing it from DSE when
+    stale. Only the worker holding the refresh lease scrapes; everyone else
+    keeps serving the previous snapshot until the new one lands.
+    """
+    collection, doc_type, max_age, refresh = FEEDS[name]
+    cache = db[collection].find_one({"type": doc_type})
+    cached_data = cache['data'] if cache and 'data' in cache else []
+
+    age = cache_age(cache)
+    if age is not None and age < max_age:
+        return cached_data
+    if not allow_refresh:
+        return cached_data
+
+    token = acquire_lease(db, f"feed:{name}", REFRESH_LEASE_SECONDS)
+    if not token:
+        if cache is None:
+            # Raised rather than returning [], which callers would cache
+            # as an empty feed until their local TTL ran out.
+            raise FeedUnavailable(f"{name} is being fetched by another worker")
+        return cached_data
+    try:
+        return refresh(db) or cached_data
+    finally:
+        release_lease(db, f"feed:{name}", token)
@@ -1,101 +1,183 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 import os
-from datetime import datetime, timedelta
+from . import model_registry
 
-def get_lstm_prediction(symbol, historical_data_list, prediction_days=7):
+LOOKBACK = 60
+
+
+def prepare_history(historical_data_list):
+    df = pd.DataFrame(historical_data_list)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.drop_duplicates(subset=['date'], keep='last')
+    df = df.sort_values('date')
+    return df
+
+
+def make_windows(series, lookback=LOOKBACK):
+    """
+    Builds the (samples, lookback, 1) model inputs as a zero-copy view over
+    series, where sample i is series[i:i+lookback] and its target series[i+lookback].
+    Returns: (X, y)
+    """
+    X = sliding_window_view(series[:-1], lookback)[..., np.newaxis]
+    return X, series[lookback:]
+
+
+def train_model(df, lookback=LOOKBACK, epochs=10):
+    """
+    Fits a MinMaxScaler and a two-layer LSTM on the close series in df.
+    Returns: (model, scaler)
+    """
+    data = df['close'].values.reshape(-1, 1)
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(data)
+
+    X, y = make_windows(scaled_data[:, 0], lookback)
+
+    model = Sequential([
+        LSTM(units=50, return_sequences=True, input_shape=(X.shape[1], 1)),
+        Dropout(0.2),
+        LSTM(units=50, return_sequences=False),
+        Dropout(0.2),
+        Dense(units=1)
+    ])
+
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    model.fit(X, y, epochs=epochs, batch_size=32, verbose=0)
+    return model, scaler
+
+
+def get_model(db, symbol, df, allow_train=True):
     """
-    Trains an LSTM model on provided historical data and predicts future prices.
+    Returns a (model, scaler) pair for symbol, reusing the registry copy when it
+    has already seen the latest bar in df and is within MODEL_MAX_AGE.
+    """
+    last_date = df['date'].iloc[-1].strftime('%Y-%m-%d')
+    entry = model_registry.load(db, symbol)
+    if entry and model_registry.is_fresh(entry[2], last_date):
+        return entry[0], entry[1]
+
+    if not allow_train:
+        # A stale model still beats no answer when training is disabled.
+        return (entry[0], entry[1]) if entry else (None, None)
+
+    with model_registry.training_lock(db, symbol):
+        # Another thread or process may have trained it while we waited.
+        entry = model_registry.load(db, symbol)
+        if entry and model_registry.is_fresh(entry[2], last_date):
+            return entry[0], entry[1]
+        model, scaler = train_model(df)
+        model_registry.save(db, symbol, model, scaler, last_date, rows=len(df))
+    return model, scaler
+
+
+def train_and_register(db, symbol, historical_data_list, force=False):
+    """
+    Offline entry point: trains and saves a model for symbol unless the
+    registry already holds a fresh one.
+    Returns: (status, last_date) where status is 'trained', 'fresh' or 'insufficient'
+    """
+    if not historical_data_list or len(historical_data_list) < 100:
+        return 'insufficient', None
+
+    df = prepare_history(historical_data_list)
+    last_date = df['date'].iloc[-1].strftime('%Y-%m-%d')
+    if not force and model_registry.is_fresh(model_registry.read_meta(db, symbol), last_date):
+        return 'fresh', last_date
+
+    with model_registry.training_lock(db, symbol):
+        if not force and model_registry.is_fresh(model_registry.read_meta(db, symbol), last_date):
+            return 'fresh', last_date
+        model, scaler = train_model(df)
+        model_registry.save(db, symbol, model, scaler, last_date, rows=len(df))
+    return 'trained', last_date
+
+
+def _step_fn(model):
+    # Kept on the model itself: the step closes over the model, so any
+    # external cache keyed by it would keep every retrained model alive.
+    step = getattr(model, '_shapla_step', None)
+    if step is None:
+        import tensorflow as tf
+        step = tf.function(lambda x: model(x, training=False), reduce_retracing=True)
+        # Bypasses Keras attribute tracking, so the step is not saved with the model.
+        object.__setattr__(model, '_shapla_step', step)
+    return step
+
+
+def rollout(model, windows, steps):
+    """
+    Autoregressively forecasts steps values for a batch of scaled input
+    windows of shape (batch, lookback). Each step feeds the previous outputs
+    back in through one preallocated buffer and a graph-compiled forward pass,
+    instead of a model.predict call and array copy per day.
+    Returns: (batch, steps) array of scaled forecasts
+    """
+    batch, lookback = windows.shape
+    buffer = np.empty((batch, lookback + steps, 1), dtype='float32')
+    buffer[:, :lookback, 0] = windows
+    step = _step_fn(model)
+    for t in range(steps):
+        buffer[:, lookback + t, 0] = step(buffer[:, t:t + lookback]).numpy()[:, 0]
+    return buffer[:, lookback:, 0]
+
+
+def forecast(df, model, scaler, prediction_days=7, lookback=LOOKBACK):
+    """
+    Runs the fitted model over df once and rolls it forward prediction_days.
     Returns: (actual_history, prediction_data, trend)
     """
+    closes = df['close'].to_numpy(dtype='float64')
+    dates = df['date'].dt.strftime('%Y-%m-%d').tolist()
+    scaled_data = scaler.transform(closes.reshape(-1, 1))
+
+    X, _ = make_windows(scaled_data[:, 0], lookback)
+    predicted_scaled = model.predict(X, batch_size=256, verbose=0)
+    predicted_values = scaler.inverse_transform(predicted_scaled).ravel()
+
+    future_scaled = rollout(model, scaled_data[-lookback:, 0][np.newaxis, :], prediction_days)
+    rescaled_preds = scaler.inverse_transform(future_scaled.reshape(-1, 1)).ravel()
+
+    # The first lookback days have no window to predict from, so the series
+    # starts with the actual closes, then the fitted values, then the forecast.
+    future_dates = df['date'].iloc[-1] + pd.to_timedelta(np.arange(1, prediction_days + 1), unit='D')
+    series_dates = dates + future_dates.strftime('%Y-%m-%d').tolist()
+    series_values = np.concatenate([closes[:lookback], predicted_values, rescaled_preds]).tolist()
+    prediction_series = [{"date": d, "value": v} for d, v in zip(series_dates, series_values)]
+
+    trend = 'upward' if rescaled_preds[0] > closes[-1] else 'downward'
+    actual_history_list = [{"date": d, "close": c} for d, c in zip(dates, closes.tolist())]
+    return actual_history_list, prediction_series, trend
+
+
+def get_lstm_prediction(symbol, historical_data_list, prediction_days=7, allow_train=True, db=None):
+    """
+    Predicts future prices with the symbol's cached LSTM, training it on the
+    provided historical data first if no fresh model is registered.
+    Returns: (actual_history, prediction_data, trend)
+    Raises ModelNotTrained if there is no model and allow_train is off.
+    """
     try:
         # 1. Load data from provided list
         if not historical_data_list or len(historical_data_list) < 100:
             print(f"Insufficient data for {symbol}: {len(historical_data_list) if historical_data_list else 0} rows")
             return None, None, None
             
-        df = pd.DataFrame(historical_data_list)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.drop_duplicates(subset=['date'], keep='last')
-        df = df.sort_values('date')
-        
-        data = df['close'].values.reshape(-1, 1)
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(data)
-        
-        lookback = 60
-        X, y = [], []
-        for i in range(lookback, len(scaled_data)):
-            X.append(scaled_data[i-lookback:i, 0])
-            y.append(scaled_data[i, 0])
-            
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
-        
-        model = Sequential([
-            LSTM(units=50, return_sequences=True, input_shape=(X.shape[1], 1)),
-            Dropout(0.2),
-            LSTM(units=50, return_sequences=False),
-            Dropout(0.2),
-            Dense(units=1)
-        ])
-        
-        model.compile(optimizer='adam', loss='mean_squared_error')
-        model.fit(X, y, epochs=10, batch_size=32, verbose=0)
-        predicted_scaled = model.predict(X, verbose=0)
-        predicted_values = scaler.inverse_transform(predicted_scaled).flatten()
-        
-        prediction_series = []
-        
-        for i in range(lookback):
-            curr_date = df['date'].iloc[i]
-            prediction_series.append({
-                "date": curr_date.strftime('%Y-%m-%d'),
-                "value": float(df['close'].iloc[i])
-            })
-            
-        predicted_scaled = model.predict(X, verbose=0)
-        predicted_values = scaler.inverse_transform(predicted_scaled).flatten()
-        
-        for i in range(len(predicted_values)):
-            curr_date = df['date'].iloc[i + lookback]
-            prediction_series.append({
-                "date": curr_date.strftime('%Y-%m-%d'),
-                "value": float(predicted_values[i])
-            })
-            
-        last_60_days = scaled_data[-lookback:]
-        current_batch = last_60_days.reshape((1, lookback, 1))
-        
-        future_predictions = []
-        for _ in range(prediction_days):
-            current_pred = model.predict(current_batch, verbose=0)[0]
-            future_predictions.append(current_pred)
-            current_batch = np.append(current_batch[:, 1:, :], [[current_pred]], axis=1)
-            
-        rescaled_preds = scaler.inverse_transform(future_predictions).flatten()
-        
-        last_date = df['date'].iloc[-1]
-        for i, val in enumerate(rescaled_preds):
-            next_date = last_date + timedelta(days=i+1)
-            prediction_series.append({
-                "date": next_date.strftime('%Y-%m-%d'),
-                "value": float(val)
-            })
-            
-        last_actual = float(df['close'].iloc[-1])
-        first_pred = float(rescaled_preds[0])
-        trend = 'upward' if first_pred > last_actual else 'downward'
-            
-        actual_history = df[['date', 'close']].copy()
-        actual_history['date'] = actual_history['date'].dt.strftime('%Y-%m-%d')
-        actual_history_list = actual_history.to_dict('records')
-        
-        return actual_history_list, prediction_series, trend
+        df = prepare_history(historical_data_list)
 
+        model, scaler = get_model(db, symbol, df, allow_train=allow_train)
+        if model is None:
+            raise model_registry.ModelNotTrained(f"Model for {symbol} is not trained yet")
+
+        return forecast(df, model, scaler, prediction_days)
+
+    except model_registry.ModelNotTrained:
+        raise
     except Exception as e:
         print(f"Error in prediction: {str(e)}")
         import traceback
@@ -103,10 +185,15 @@ def get_lstm_prediction(symbol, historical_data_list, prediction_days=7):
         return None, None, None
 
 if __name__ == "__main__":
+    # Usage: python -m app.stocks.ml_logic SYMBOL
     import sys
-    symbol = sys.argv[1] if len(sys.argv) > 1 else 'GP'
-    csv = "DSE_Data.csv"
-    hist, pred, trend = get_lstm_prediction(symbol, csv)
+    import certifi
+    from pymongo import MongoClient
+    from .prediction import load_prediction_history
+
+    symbol = sys.argv[1].upper() if len(sys.argv) > 1 else 'GP'
+    db = MongoClient(os.getenv("MONGO_URI"), tlsCAFile=certifi.where())["bdshare"]
+    hist, pred, trend = get_lstm_prediction(symbol, load_prediction_history(db, symbol), db=db)
     if hist:
         print(f"Trend for {symbol}: {trend}")
         print(f"Last 3 historical fit:")
@@ -0,0 +1,159 @@
+import os
+import pickle
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import gridfs
+from gridfs.errors import NoFile
+from ..cache import acquire_lease, release_lease
+
+# Trained models live in Mongo, so every web worker and dyno serves what
+# scripts/train_models.py (or any other worker) trained:
+#   model_registry           {_id: SYMBOL, last_date, trained_at, name,
+#                             model_file, scaler_file, ...}
+#   models.files / .chunks   GridFS bucket: the .keras file and the pickled
+#                            MinMaxScaler, tagged with metadata.symbol
+# Each save uploads a pair under fresh names and replaces the registry
+# document last, so readers only ever see a complete model. The previous
+# pair is kept one more save for readers that fetched the old document just
+# before it was replaced. Keras loads from a path, so each process keeps a
+# download cache under MODEL_DIR; it can be ephemeral.
+MODEL_DIR = os.environ.get(
+    'MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'models')
+)
+MODEL_MAX_AGE = timedelta(hours=float(os.environ.get('MODEL_MAX_AGE_HOURS', 24)))
+MODEL_BUCKET = 'models'
+# Longer than an LSTM fit; a trainer that dies frees its symbol after this.
+TRAINING_LEASE_SECONDS = 1800
+# Superseded downloads are removed once no load can still be opening them.
+CACHE_GRACE_SECONDS = 600
+
+_loaded = {}
+
+
+class ModelNotTrained(Exception):
+    """No model is registered for a symbol and training on request is off."""
+
+
+def _bucket(db):
+    return gridfs.GridFSBucket(db, bucket_name=MODEL_BUCKET)
+
+
+def _symbol_dir(symbol):
+    return os.path.join(MODEL_DIR, symbol.upper())
+
+
+def read_meta(db, symbol):
+    return db.model_registry.find_one({"_id": symbol.upper()})
+
+
+def is_fresh(meta, last_date, now=None):
+    """A model is reusable if it has seen `last_date` and is not too old."""
+    if not meta:
+        return False
+    now = now or datetime.utcnow()
+    trained_at = datetime.fromisoformat(meta['trained_at'])
+    return meta['last_date'] >= last_date and now - trained_at < MODEL_MAX_AGE
+
+
+def _download_model(db, symbol, meta):
+    """Returns the local path of the registered .keras file, downloading it once."""
+    symbol_dir = _symbol_dir(symbol)
+    os.makedirs(symbol_dir, exist_ok=True)
+    path = os.path.join(symbol_dir, f"{meta['name']}.keras")
+    if not os.path.exists(path):
+        # Keras picks the format from the extension, so temp files keep it.
+        tmp = os.path.join(symbol_dir, f".{meta['name']}.{uuid.uuid4().hex[:8]}.tmp.keras")
+        with open(tmp, 'wb') as f:
+            _bucket(db).download_to_stream(meta['model_file'], f)
+        os.replace(tmp, path)
+
+    cutoff = time.time() - CACHE_GRACE_SECONDS
+    for entry in os.listdir(symbol_dir):
+        other = os.path.join(symbol_dir, entry)
+        try:
+            if other != path and os.path.getmtime(other) < cutoff:
+                os.remove(other)
+        except OSError:
+            pass
+    return path
+
+
+def load(db, symbol):
+    """Returns (model, scaler, meta) for a symbol, or None if none is registered."""
+    symbol = symbol.upper()
+    meta = read_meta(db, symbol)
+    if not meta:
+        return None
+
+    cached = _loaded.get(symbol)
+    if cached and cached[2] == meta:
+        return cached
+
+    from tensorflow.keras.models import load_model
+
+    model = load_model(_download_model(db, symbol, meta))
+    scaler = pickle.loads(_bucket(db).open_download_stream(meta['scaler_file']).read())
+
+    _loaded[symbol] = (model, scaler, meta)
+    return _loaded[symbol]
+
+
+@contextmanager
+def training_lock(db, symbol):
+    """Held while a symbol is trained and saved; blocks until the current trainer finishes."""
+    key = f"train:{symbol.upper()}"
+    token = acquire_lease(db, key, TRAINING_LEASE_SECONDS)
+    while not token:
+        time.sleep(1)
+        token = acquire_lease(db, key, TRAINING_LEASE_SECONDS)
+    try:
+        yield
+    finally:
+        release_lease(db, key, token)
+
+
+def save(db, symbol, model, scaler, last_date, **extra):
+    """Uploads a model pair and registers it; call under training_lock()."""
+    symbol = symbol.upper()
+    symbol_dir = _symbol_dir(symbol)
+    os.makedirs(symbol_dir, exist_ok=True)
+    previous = read_meta(db, symbol)
+    bucket = _bucket(db)
+
+    name = f'{last_date}-{uuid.uuid4().hex[:12]}'
+    tmp_model = os.path.join(symbol_dir, f'.{name}.tmp.keras')
+    model.save(tmp_model)
+    with open(tmp_model, 'rb') as f:
+        model_file = bucket.upload_from_stream(f'{symbol}/{name}.keras', f, metadata={"symbol": symbol})
+    # Also the local download cache entry, so this process never fetches it.
+    os.replace(tmp_model, os.path.join(symbol_dir, f'{name}.keras'))
+    scaler_file = bucket.upload_from_stream(f'{symbol}/{name}.scaler', pickle.dumps(scaler),
+                                            metadata={"symbol": symbol})
+
+    meta = {
+        '_id': symbol,
+        'symbol': symbol,
+        'last_date': last_date,
+        'trained_at': datetime.utcnow().isoformat(),
+        'name': name,
+        'model_file': model_file,
+        'scaler_file': scaler_file,
+        **extra
+    }
+    db.model_registry.replace_one({"_id": symbol}, meta, upsert=True)
+
+    keep = {model_file, scaler_file}
+    if previous:
+        keep |= {previous['model_file'], previous['scaler_file']}
+    for stored in db[f'{MODEL_BUCKET}.files'].find({"metadata.symbol": symbol}, {"_id": 1}):
+        if stored['_id'] not in keep:
+            try:
+                bucket.delete(stored['_id'])
+            except NoFile:
+                pass
+
+    _loaded[symbol] = (model, scaler, meta)
+    return meta
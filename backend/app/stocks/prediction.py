@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from .archive import get_closes
+from .history_store import get_history
+from .forecasters import get_forecaster
+
+# DSE_Data.csv covers the market up to this date; later bars come from the
+# local daily-bar store.
+ARCHIVE_CUTOFF = '2025-04-15'
+
+
+def load_prediction_history(db, symbol):
+    """
+    Merges the static archive with stored daily bars into the two-year close
+    series the forecasters train on. Returns a list of {date, close} dicts.
+    """
+    archive_dates, archive_closes = get_closes(symbol, until=ARCHIVE_CUTOFF)
+    excel_data = [
+        {"date": d, "close": c}
+        for d, c in zip(np.datetime_as_string(archive_dates, unit='D').tolist(), archive_closes.tolist())
+    ]
+
+    api_data_raw = get_history(db, symbol, days=730)
+    api_data = []
+    for d in api_data_raw:
+        if pd.Timestamp(d['date']) > pd.Timestamp(ARCHIVE_CUTOFF):
+            api_data.append({
+                "date": d['date'],
+                "close": d['close']
+            })
+
+    df_merged = pd.DataFrame(excel_data + api_data)
+    if df_merged.empty:
+        return []
+
+    df_merged['date'] = pd.to_datetime(df_merged['date'])
+    df_merged = df_merged.drop_duplicates(subset=['date'], keep='last')
+    df_merged = df_merged.sort_values('date')
+
+    two_years_ago = pd.Timestamp.now() - pd.DateOffset(years=2)
+    df_final = df_merged[df_merged['date'] >= two_years_ago].copy()
+
+    historical_list = df_final.to_dict('records')
+    for item in historical_list:
+        item['date'] = item['date'].strftime('%Y-%m-%d')
+    return historical_list
+
+
+def run_prediction(db, symbol, allow_train=True, prediction_days=7, model='lstm'):
+    """
+    Loads history and runs the named forecaster for symbol.
+    Returns: (payload, error) where exactly one of the two is set.
+    """
+    forecaster = get_forecaster(model)
+    if not forecaster:
+        return None, f"Unknown prediction model: {model}"
+
+    historical_list = load_prediction_history(db, symbol)
+    if not historical_list:
+        return None, "No data available for prediction"
+
+    actual_hist, prediction_series, trend = forecaster(
+        symbol, historical_list, prediction_days=prediction_days, allow_train=allow_train, db=db
+    )
+    if not actual_hist:
+        return None, "Insufficient data for prediction"
+
+    return {
+        "symbol": symbol,
+        "model": model,
+        "actual": actual_hist,
+        "prediction": prediction_series,
+        "trend": trend
+    }, None
@@ -0,0 +1,215 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+from ..encoding import encode_json
+
+# Price change log. Every latest-price refresh compares the new snapshot
+# with the previous one and appends one compact event per changed symbol to
+# the capped `price_changes` collection: {symbol, at, fields: {field:
+# value}}. Incremental clients read it with changes_since(); each web worker
+# also runs one tailing thread over it and fans every refresh out to its
+# in-process SSE subscribers, so a refresh costs one Mongo read per worker
+# however many tabs are connected.
+CHANGES_COLLECTION = 'price_changes'
+# About a week of trading-hour refreshes at one-minute polling.
+CHANGES_COLLECTION_BYTES = 128 * 1024 * 1024
+STREAM_FIELDS = ('ltp', 'high', 'low', 'open', 'closep', 'ycp', 'change',
+                 'percent_change', 'trade', 'value', 'volume')
+SUBSCRIBER_QUEUE = 100
+
+
+def diff_snapshots(previous, current, fields=STREAM_FIELDS):
+    """Returns {symbol: {field: new value}} for rows that differ between two snapshots."""
+    before = {row['symbol']: row for row in previous or ()}
+    changes = {}
+    for row in current:
+        old = before.get(row['symbol'])
+        changed = {f: row.get(f) for f in fields
+                   if f in row and (old is None or old.get(f) != row.get(f))}
+        if changed:
+            changes[row['symbol']] = changed
+    return changes
+
+
+def ensure_changes_collection(db):
+    try:
+        db.create_collection(CHANGES_COLLECTION, capped=True, size=CHANGES_COLLECTION_BYTES)
+    except CollectionInvalid:
+        return
+    db[CHANGES_COLLECTION].create_index([("symbol", ASCENDING), ("at", ASCENDING)])
+
+
+def record_changes(db, changes, at=None):
+    """Appends one event per changed symbol to the change log; returns the count."""
+    if not changes:
+        return 0
+    ensure_changes_collection(db)
+    at = at or datetime.utcnow()
+    db[CHANGES_COLLECTION].insert_many(
+        [{"symbol": symbol, "at": at, "fields": fields} for symbol, fields in changes.items()],
+        ordered=True
+    )
+    return len(changes)
+
+
+def merge_events(events):
+    """Folds change events, oldest first, into {symbol: latest fields}."""
+    merged = {}
+    for event in events:
+        merged.setdefault(event["symbol"], {}).update(event["fields"])
+    return merged
+
+
+def changes_since(db, since=None, limit=20000):
+    """
+    Returns (changes, cursor, reset) for events after the `since` cursor.
+    `cursor` is passed back as the next `since`. `reset` is True when
+    `since` is unknown or has rolled out of the capped log; the client must
+    then reload the full snapshot, and the returned cursor is the newest one.
+    """
+    collection = db[CHANGES_COLLECTION]
+    try:
+        since_id = ObjectId(since) if since else None
+    except (InvalidId, TypeError):
+        since_id = None
+
+    if since_id is not None:
+        # One query on the common path: the `since` event itself comes first
+        # while it is still in the log, then everything after it.
+        events = list(collection.find({"_id": {"$gte": since_id}}).sort("$natural", 1).limit(limit + 1))
+        if events and events[0]["_id"] == since_id:
+            events = events[1:]
+            if not events:
+                return {}, str(since_id), False
+            return merge_events(events), str(events[-1]["_id"]), False
+
+    newest = collection.find_one(sort=[("$natural", -1)], projection={"_id": 1})
+    return {}, str(newest["_id"]) if newest else None, True
+
+
+def format_event(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + encode_json(data).decode())
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self.overflowed = False
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+    def reset(self):
+        # Drops queued deltas; the caller resends a full snapshot instead.
+        self.overflowed = False
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class PriceBroadcaster:
+    """
+    Per-process fan-out of the change log. The tailing thread starts with the
+    first subscriber (after gunicorn has forked) and lives for the process.
+    Subscribers that fall SUBSCRIBER_QUEUE events behind are marked
+    overflowed and should resend a snapshot instead of the missed deltas.
+    Each open stream holds a worker thread, so subscribe() takes a cap.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._guard = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, db, symbols=None, limit=None):
+        """Returns a Subscription, or None when `limit` streams are already open."""
+        sub = Subscription(frozenset(symbols) if symbols else None)
+        with self._guard:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._tail, args=(db,),
+                                                name='price-stream', daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._guard:
+            self._subscribers.discard(sub)
+
+    def dispatch(self, changes, event_id):
+        # The unfiltered event is encoded once and shared by every
+        # subscriber without a symbol filter.
+        everything = format_event('delta', changes, event_id)
+        with self._guard:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if sub.symbols is None:
+                event = everything
+            else:
+                subset = {s: changes[s] for s in sub.symbols if s in changes}
+                if not subset:
+                    continue
+                event = format_event('delta', subset, event_id)
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                sub.overflowed = True
+
+    def _tail(self, db):
+        try:
+            self._tail_forever(db)
+        finally:
+            # Lets the next subscribe() start a new thread.
+            with self._guard:
+                self._thread = None
+
+    def _tail_forever(self, db):
+        collection = db[CHANGES_COLLECTION]
+        positioned, last_id = False, None
+        while True:
+            try:
+                if not positioned:
+                    try:
+                        ensure_changes_collection(db)
+                    except OperationFailure as e:
+                        # e.g. no createCollection right; the poller may
+                        # still have created the collection.
+                        print(f"Could not create {CHANGES_COLLECTION}: {e}")
+                    last = collection.find_one(sort=[("$natural", -1)], projection={"_id": 1})
+                    last_id = last["_id"] if last else None
+                    positioned = True
+                query = {"_id": {"$gt": last_id}} if last_id else {}
+                cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(500)
+                while cursor.alive:
+                    # Events of one refresh share `at`; they are sent to
+                    # subscribers as a single delta.
+                    batch, batch_at = [], None
+                    for doc in cursor:
+                        if batch and doc["at"] != batch_at:
+                            self.dispatch(merge_events(batch), str(last_id))
+                            batch = []
+                        batch.append(doc)
+                        batch_at, last_id = doc["at"], doc["_id"]
+                    if batch:
+                        self.dispatch(merge_events(batch), str(last_id))
+            except PyMongoError as e:
+                print(f"Price stream tail error: {e}")
+            # The cursor dies when the collection is empty or was recreated.
+            time.sleep(1)
+
+
+broadcaster = PriceBroadcaster()
@@ -1,22 +1,35 @@
-from flask import Blueprint, jsonify, request
+import queue
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 from ..db import mongo
 from datetime import datetime, timedelta, timezone
-import os
-import pandas as pd
-from .ml_logic import get_lstm_prediction
-from .scraper import scrape_latest_prices
-from .scraper import scrape_company_details
-from .scraper import scrape_historical_data, scrape_current_price
+from .jobs import submit_prediction, get_job, serialize_job
+from ..cache import TTLCache
+from ..encoding import requested_fields, respond, shape_rows
+
+# Scraping (pandas), forecasting and ML modules are imported inside the
+# handlers that need them, so app startup and light endpoints stay cheap.
 
 stocks_bp = Blueprint('stocks', __name__)
 
+# Per-worker copy of the market-wide feeds, in front of their Mongo caches.
+feed_cache = TTLCache()
+# Per-worker change-log answers by ?since= cursor. After a refresh most
+# polling tabs hold the same cursor, so they share one Mongo read.
+changes_cache = TTLCache()
+CHANGES_CACHE_KEYS = 256
+
 @stocks_bp.route('/', methods=['GET'])
 def get_stocks():
     query = request.args.get('search')
     
     filter_q = {}
+    matches = None
     if query:
-        filter_q["symbol"] = {"$regex": query.upper(), "$options": "i"}
+        # Matched in memory (symbol, company name, fuzzy); Mongo then only
+        # looks the symbols up through the unique symbol index.
+        from .search import get_symbol_index
+        matches = [m['symbol'] for m in get_symbol_index(mongo.db).search(query, limit=None)]
+        filter_q["symbol"] = {"$in": matches}
 
     page = int(request.args.get('page', 1))
     limit = int(request.args.get('limit', 50))
@@ -25,16 +38,22 @@ def get_stocks():
     sort_by = request.args.get('sort', 'volume')
     sort_order = -1 if request.args.get('order', 'desc') == 'desc' else 1
     
-    stocks_cursor = mongo.db.stocks.find(filter_q).sort(sort_by, sort_order).skip(skip).limit(limit)
-    total = mongo.db.stocks.count_documents(filter_q)
+    fields = requested_fields()
+    projection = {f: 1 for f in fields} if fields else None
+    if fields and '_id' not in fields:
+        projection['_id'] = 0
+
+    stocks_cursor = mongo.db.stocks.find(filter_q, projection).sort(sort_by, sort_order).skip(skip).limit(limit)
+    total = len(matches) if matches is not None else mongo.db.stocks.estimated_document_count()
     
     stocks = []
     for stock in stocks_cursor:
-        stock['_id'] = str(stock['_id'])
+        if '_id' in stock:
+            stock['_id'] = str(stock['_id'])
         stocks.append(stock)
         
-    return jsonify({
-        "stocks": stocks,
+    return respond({
+        "stocks": shape_rows(stocks, fields),
         "total": total,
         "page": page,
         "pages": (total + limit - 1) // limit
@@ -42,6 +61,28 @@ def get_stocks():
 
 
 
+@stocks_bp.route('/search', methods=['GET'])
+def search_symbols():
+    """Typeahead: ?q=gram&limit=10 -> [{symbol, company_name, ltp, percent_change}]."""
+    from .search import get_symbol_index
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    results = get_symbol_index(mongo.db).search(request.args.get('q', ''), limit=limit)
+    try:
+        prices = {row['symbol']: row for row in _feed('latest_prices') or []}
+    except Exception as e:
+        print(f"Error reading prices for search: {e}")
+        prices = {}
+    for result in results:
+        row = prices.get(result['symbol'], {})
+        result['ltp'] = row.get('ltp')
+        result['percent_change'] = row.get('percent_change')
+    return respond(shape_rows(results))
+
+
 @stocks_bp.route('/<symbol>', methods=['GET'])
 def get_stock(symbol):
     stock = mongo.db.stocks.find_one({"symbol": symbol.upper()})
@@ -83,6 +124,7 @@ def get_stock(symbol):
         needs_update = True
         
     if needs_update:
+        from .scraper import scrape_company_details
         details = scrape_company_details(symbol.upper())
         if details:
             details['details_updated_at'] = datetime.utcnow()
@@ -102,11 +144,14 @@ def get_stock(symbol):
 
 @stocks_bp.route('/<symbol>/history', methods=['GET'])
 def get_stock_history(symbol):
+    from .history_store import get_history
+    from .scraper import scrape_current_price
+
     range_param = request.args.get('range', '1M')
     
     # Map range to days
     days_map = {
-        '1D': 1, 
+        '1D': 5,
         '5D': 7,
         '1M': 30,
         '6M': 180,
@@ -117,8 +162,17 @@ def get_stock_history(symbol):
     
         
     if range_param == '1D':
-        days = 3650  
-        history = scrape_historical_data(symbol.upper(), days=days)
+        # Minute bars of the current or most recent session when the poller
+        # recorded it; otherwise (older bars, holidays, no poller) the last
+        # few daily bars plus a live one.
+        from .intraday import get_intraday
+        from .market_feed import DSE_TZ, last_session_day
+        intraday = get_intraday(mongo.db, symbol.upper(), DSE_TZ, day=last_session_day(), interval=5)
+        if intraday:
+            return _history_response(intraday)
+
+        # A few calendar days so the last session is present over weekends.
+        history = get_history(mongo.db, symbol.upper(), days=days_map['1D'])
         
         try:
             current_price = scrape_current_price(symbol.upper())
@@ -138,10 +192,10 @@ def get_stock_history(symbol):
         except Exception as e:
             print(f"Error adding current price to history: {e}")
         
-        return jsonify(history)
+        return _history_response(history)
 
     days = days_map.get(range_param, 30)
-    history = scrape_historical_data(symbol.upper(), days=days)
+    history = get_history(mongo.db, symbol.upper(), days=days)
     
     try:
         current_price = scrape_current_price(symbol.upper())
@@ -163,105 +217,124 @@ def get_stock_history(symbol):
     except Exception as e:
         print(f"Error adding current price to history: {e}")
     
+    return _history_response(history)
+
+@stocks_bp.route('/<symbol>/intraday', methods=['GET'])
+def get_stock_intraday(symbol):
+    """Minute bars recorded by the price poller: ?interval=1|5, ?day=YYYY-MM-DD."""
+    from .intraday import INTERVALS, get_intraday
+    from .market_feed import DSE_TZ
+
+    try:
+        interval = int(request.args.get('interval', 1))
+    except ValueError:
+        interval = None
+    if interval not in INTERVALS:
+        return jsonify({"error": f"interval must be one of {', '.join(map(str, INTERVALS))}"}), 400
+
+    bars = get_intraday(mongo.db, symbol.upper(), DSE_TZ, day=request.args.get('day'), interval=interval)
+    return _history_response(bars)
+
+def _history_response(history):
+    # Optional thinning for long ranges: ?resolution=weekly|monthly
+    # aggregates bars, ?max_points=N keeps N bars by LTTB, and
+    # ?format=columns returns one array per field.
+    from .downsample import RESOLUTIONS, downsample, resample, to_columns
+
+    resolution = request.args.get('resolution', 'daily').lower()
+    if resolution not in RESOLUTIONS:
+        return jsonify({"error": f"Unknown resolution: {resolution}"}), 400
+    try:
+        max_points = int(request.args.get('max_points', 0))
+    except ValueError:
+        return jsonify({"error": "max_points must be an integer"}), 400
+
+    history = downsample(resample(history, resolution), max_points)
+    if request.args.get('format') == 'columns':
+        return jsonify(to_columns(history))
     return jsonify(history)
     
-@stocks_bp.route('/<symbol>/prediction', methods=['GET'])
-def get_prediction(symbol):
-  
+def _prediction_days():
+    """Returns ?days= clamped to the supported range, or None if it is not a number."""
+    from .forecasters import MAX_PREDICTION_DAYS
     try:
-        csv_path = os.path.join(os.path.dirname(__file__), 'DSE_Data.csv')
-        
-        if not os.path.exists(csv_path):
-             csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'DSE_Data.csv')
-
-        excel_data = []
-        if os.path.exists(csv_path):
-            df_all = pd.read_csv(csv_path)
-            df_symbol = df_all[df_all['Trading_Code'] == symbol.upper()].copy()
-            df_symbol['Date'] = pd.to_datetime(df_symbol['Date'])
-            
-            cutoff_date = pd.Timestamp('2025-04-15')
-            df_excel = df_symbol[df_symbol['Date'] <= cutoff_date].copy()
-            
-            for _, row in df_excel.iterrows():
-                excel_data.append({
-                    "date": row['Date'].strftime('%Y-%m-%d'),
-                    "close": float(row['Close'])
-                })
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        return None
+    return max(1, min(days, MAX_PREDICTION_DAYS))
 
-        api_data_raw = scrape_historical_data(symbol.upper(), days=730)
-        api_data = []
-        for d in api_data_raw:
-            if pd.Timestamp(d['date']) > pd.Timestamp('2025-04-15'):
-                api_data.append({
-                    "date": d['date'],
-                    "close": d['close']
-                })
+def _prediction_model():
+    return request.args.get('model', current_app.config['PREDICTION_MODEL']).lower()
 
-        merged_data = excel_data + api_data
-        df_merged = pd.DataFrame(merged_data)
-        if df_merged.empty:
-             return jsonify({"error": "No data available for prediction"}), 400
-             
-        df_merged['date'] = pd.to_datetime(df_merged['date'])
-        df_merged = df_merged.drop_duplicates(subset=['date'], keep='last')
-        df_merged = df_merged.sort_values('date')
-        
-        two_years_ago = pd.Timestamp.now() - pd.DateOffset(years=2)
-        df_final = df_merged[df_merged['date'] >= two_years_ago].copy()
-        
-        historical_list = df_final.to_dict('records')
-        for item in historical_list:
-            item['date'] = item['date'].strftime('%Y-%m-%d')
+@stocks_bp.route('/<symbol>/prediction', methods=['GET'])
+def get_prediction(symbol):
+    prediction_days = _prediction_days()
+    if prediction_days is None:
+        return jsonify({"error": "days must be an integer"}), 400
 
-        actual_hist, prediction_series, trend = get_lstm_prediction(symbol.upper(), historical_list)
-        
-        if not actual_hist:
-            return jsonify({"error": "Insufficient data for prediction"}), 400
+    from .model_registry import ModelNotTrained
+    try:
+        from .prediction import run_prediction
+        payload, error = run_prediction(
+            mongo.db, symbol.upper(),
+            allow_train=current_app.config['PREDICTION_TRAIN_ON_REQUEST'],
+            prediction_days=prediction_days,
+            model=_prediction_model()
+        )
+        if error:
+            return jsonify({"error": error}), 400
             
-        return jsonify({
-            "symbol": symbol.upper(),
-            "actual": actual_hist,
-            "prediction": prediction_series,
-            "trend": trend
-        })
+        return jsonify(payload)
+    except ModelNotTrained as e:
+        # Training on request is off and the offline run has not covered it.
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         print(f"Prediction route error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@stocks_bp.route('/<symbol>/prediction/jobs', methods=['POST'])
+def create_prediction_job(symbol):
+    from .forecasters import get_forecaster
+    if not get_forecaster(_prediction_model()):
+        return jsonify({"error": f"Unknown prediction model: {_prediction_model()}"}), 400
+    prediction_days = _prediction_days()
+    if prediction_days is None:
+        return jsonify({"error": "days must be an integer"}), 400
+    try:
+        job = submit_prediction(
+            current_app._get_current_object(), symbol.upper(),
+            allow_train=current_app.config['PREDICTION_TRAIN_ON_REQUEST'],
+            prediction_days=prediction_days,
+            model=_prediction_model()
+        )
+        return jsonify(serialize_job(job)), 202
+    except Exception as e:
+        print(f"Prediction job submit error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@stocks_bp.route('/prediction/jobs/<job_id>', methods=['GET'])
+def get_prediction_job(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(serialize_job(job))
+
+def _feed(name):
+    from .market_feed import load_feed
+    # With the poller running the Mongo cache is the only source of truth.
+    allow_refresh = not current_app.config['MARKET_POLLER_ENABLED']
+    ttl = current_app.config['FEED_LOCAL_TTL_SECONDS']
+    return feed_cache.get(
+        name,
+        lambda: load_feed(mongo.db, name, allow_refresh=allow_refresh),
+        ttl=ttl,
+        stale_ttl=ttl * 6
+    )
+
 @stocks_bp.route('/indices', methods=['GET'])
 def get_indices():
     try:
-        from .scraper import scrape_market_indices
-        
-        cache = mongo.db.indices_cache.find_one({"type": "market_indices"})
-        
-        if cache and 'updated_at' in cache:
-            cache_time = cache['updated_at']
-            if isinstance(cache_time, str):
-                cache_time = datetime.fromisoformat(cache_time)
-            
-            if (datetime.utcnow() - cache_time).seconds < 120:  # 2 minutes
-                return jsonify(cache['data'])
-        
-        indices = scrape_market_indices()
-        
-        if indices:
-            mongo.db.indices_cache.update_one(
-                {"type": "market_indices"},
-                {"$set": {
-                    "data": indices,
-                    "updated_at": datetime.utcnow()
-                }},
-                upsert=True
-            )
-            
-            return jsonify(indices)
-        else:
-            if cache and 'data' in cache:
-                return jsonify(cache['data'])
-            return jsonify([])
-            
+        return jsonify(_feed('indices'))
     except Exception as e:
         print(f"Error in get_indices: {e}")
         return jsonify([])
@@ -270,40 +343,99 @@ def get_indices():
 
 @stocks_bp.route('/latest-prices', methods=['GET'])
 def get_latest_prices():
+    from .market_feed import FeedUnavailable
     try:
-        cache = mongo.db.latest_prices_cache.find_one({"type": "all_prices"})
-    
-        if cache and 'updated_at' in cache:
-            cache_time = cache['updated_at']
-            if isinstance(cache_time, str):
-                cache_time = datetime.fromisoformat(cache_time)
-            
-            if (datetime.utcnow() - cache_time).seconds < 300:  # 5 minutes
-                return jsonify(cache['data'])
-        
-        latest_prices = scrape_latest_prices()
-        
-        if latest_prices:
-            mongo.db.latest_prices_cache.update_one(
-                {"type": "all_prices"},
-                {"$set": {"data": latest_prices, "updated_at": datetime.utcnow()}},
-                upsert=True
-            )
-            
-            for stock in latest_prices:
-                mongo.db.stocks.update_one(
-                    {"symbol": stock['symbol']},
-                    {"$set": stock},
-                    upsert=True
-                )
-        
-        return jsonify(latest_prices)
-        
+        return respond(shape_rows(_feed('latest_prices')))
+    except FeedUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '5'}
     except Exception as e:
         print(f"Error getting latest prices: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@stocks_bp.route('/latest-prices/changes', methods=['GET'])
+def get_latest_price_changes():
+    """
+    Incremental price updates: {changes: {symbol: {field: value}}, cursor,
+    reset}. Pass the returned cursor as ?since= on the next call; when reset
+    is true the client must reload /latest-prices first. ?symbols= filters.
+    """
+    from .price_stream import changes_since
+    symbols = {s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()}
+    since = request.args.get('since') or ''
+    ttl = current_app.config['FEED_LOCAL_TTL_SECONDS']
+    try:
+        if len(changes_cache) > CHANGES_CACHE_KEYS:
+            # Old cursors are never asked for again; start over.
+            changes_cache.invalidate()
+        changes, cursor, reset = changes_cache.get(
+            since, lambda: changes_since(mongo.db, since or None), ttl=ttl
+        )
+        if symbols:
+            changes = {s: f for s, f in changes.items() if s in symbols}
+        return respond({"changes": changes, "cursor": cursor, "reset": reset})
+    except Exception as e:
+        print(f"Error getting latest price changes: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+# Seconds between SSE comments that keep idle connections (and proxies) open.
+STREAM_KEEPALIVE_SECONDS = 15
+
+@stocks_bp.route('/stream', methods=['GET'])
+def stream_prices():
+    """
+    Server-Sent Events feed of price changes: one 'snapshot' event with the
+    current rows, then a 'delta' event per refresh carrying only the fields
+    that moved. ?symbols=GP,ACI restricts both to those symbols.
+    """
+    from .market_feed import FeedUnavailable, load_feed
+    from .price_stream import broadcaster, format_event
+
+    symbols = {s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()}
+    allow_refresh = not current_app.config['MARKET_POLLER_ENABLED']
+    db = mongo.db
+
+    def snapshot():
+        rows = load_feed(db, 'latest_prices', allow_refresh=allow_refresh) or []
+        if symbols:
+            rows = [row for row in rows if row.get('symbol') in symbols]
+        return format_event('snapshot', shape_rows(rows))
+
+    # Subscribe before reading the snapshot so no delta falls in between.
+    sub = broadcaster.subscribe(db, symbols, limit=current_app.config['STREAM_MAX_PER_WORKER'])
+    if sub is None:
+        # Every stream pins a gthread thread; past the cap the client falls
+        # back to polling /latest-prices/changes.
+        return jsonify({"error": "Too many open streams"}), 503, {'Retry-After': '60'}
+    try:
+        first = snapshot()
+    except FeedUnavailable as e:
+        broadcaster.unsubscribe(sub)
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '5'}
+    except Exception:
+        broadcaster.unsubscribe(sub)
+        raise
+
+    def events():
+        try:
+            yield "retry: 5000\n\n"
+            yield first
+            while True:
+                if sub.overflowed:
+                    sub.reset()
+                    yield snapshot()
+                try:
+                    yield sub.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @stocks_bp.route('/keep-alive', methods=['GET'])
 def keep_alive():
     return jsonify({"message": "Server is alive"})
\ No newline at end of file
@@ -0,0 +1,102 @@
+from bisect import bisect_left
+from collections import Counter
+from ..cache import TTLCache
+
+# In-memory symbol search for typeahead and the get_stocks filter. Symbols,
+# company names and the words of each name are kept as sorted arrays for
+# prefix lookups by binary search, and a trigram index finds fuzzy and
+# substring matches ("BANK" in "BRACBANK", "grameenfone"). The index is
+# rebuilt from `stocks` in the background every SEARCH_INDEX_TTL seconds;
+# with ~400 listings a rebuild takes a few milliseconds.
+SEARCH_INDEX_TTL = 300
+# Share of the query's trigrams an entry must contain to count as a match.
+MIN_CONTAINMENT = 0.6
+
+_index_cache = TTLCache()
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _prefix_range(keys, prefix):
+    return range(bisect_left(keys, prefix), bisect_left(keys, prefix + '\uffff'))
+
+
+class SymbolIndex:
+    """
+    search(query) ranks exact symbol matches first, then symbol prefixes,
+    then company-name and name-word prefixes, then trigram matches by how
+    much of the query they contain (symbol substrings for queries under
+    three characters). Ties go to the shorter symbol.
+    """
+
+    def __init__(self, stocks):
+        self.entries = sorted({(s['symbol'], s.get('company_name') or '') for s in stocks if s.get('symbol')})
+        self._symbols = [symbol.lower() for symbol, _ in self.entries]
+
+        names = sorted((_normalize(name), i) for i, (_, name) in enumerate(self.entries) if name)
+        self._names = [name for name, _ in names]
+        self._name_ids = [i for _, i in names]
+
+        words = sorted((word, i) for i, (_, name) in enumerate(self.entries) for word in set(_normalize(name).split()))
+        self._words = [word for word, _ in words]
+        self._word_ids = [i for _, i in words]
+
+        self._grams = {}
+        for i, (symbol, name) in enumerate(self.entries):
+            for gram in trigrams(symbol.lower()) | trigrams(_normalize(name)):
+                self._grams.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=10):
+        q = _normalize(query)
+        if not q:
+            return []
+
+        ranked = {}
+
+        def add(i, rank):
+            if i not in ranked or rank < ranked[i]:
+                ranked[i] = rank
+
+        for i in _prefix_range(self._symbols, q):
+            add(i, (0 if self._symbols[i] == q else 1, 0, len(self._symbols[i])))
+        for j in _prefix_range(self._names, q):
+            add(self._name_ids[j], (2, 0, len(self._symbols[self._name_ids[j]])))
+        for j in _prefix_range(self._words, q):
+            add(self._word_ids[j], (2, 0, len(self._symbols[self._word_ids[j]])))
+
+        query_grams = trigrams(q)
+        if not query_grams:
+            # Too short for trigrams: a plain substring scan over symbols.
+            for i, symbol in enumerate(self._symbols):
+                if q in symbol:
+                    add(i, (4, 0, len(symbol)))
+        else:
+            counts = Counter(i for gram in query_grams for i in self._grams.get(gram, ()))
+            for i, shared in counts.items():
+                containment = shared / len(query_grams)
+                if containment >= MIN_CONTAINMENT:
+                    add(i, (3, -containment, len(self._symbols[i])))
+
+        order = sorted(ranked, key=lambda i: (ranked[i], self._symbols[i]))
+        if limit:
+            order = order[:limit]
+        return [{"symbol": self.entries[i][0], "company_name": self.entries[i][1] or None} for i in order]
+
+
+def load_symbol_index(db):
+    return SymbolIndex(db.stocks.find({}, {"symbol": 1, "company_name": 1, "_id": 0}))
+
+
+def get_symbol_index(db):
+    """Returns this worker's index; a stale one is served while it is rebuilt."""
+    return _index_cache.get('symbols', lambda: load_symbol_index(db),
+                            ttl=SEARCH_INDEX_TTL, stale_ttl=SEARCH_INDEX_TTL * 12)
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from ..db import mongo
+from ..encoding import requested_fields, respond, shape_rows
 import jwt
 from functools import wraps
 from flask import current_app
@@ -46,11 +47,14 @@ def get_watchlist(current_user_id):
     watchlist_symbols = user_doc.get('watchlist', [])
     
     # Fetch details for these stocks
-    stocks = list(mongo.db.stocks.find({"symbol": {"$in": watchlist_symbols}}))
+    fields = requested_fields()
+    projection = {f: 1 for f in fields} if fields else None
+    stocks = list(mongo.db.stocks.find({"symbol": {"$in": watchlist_symbols}}, projection))
     for s in stocks:
-        s['_id'] = str(s['_id'])
+        if '_id' in s:
+            s['_id'] = str(s['_id'])
         
-    return jsonify(stocks)
+    return respond(shape_rows(stocks, fields))
 
 @watchlist_bp.route('/', methods=['POST'])
 @token_required
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = "bdshare"
+
+import certifi
+from app.stocks.async_scraper import AsyncScraper
+from app.stocks.history_store import MAX_HISTORY_DAYS, missing_ranges, record_range
+
+# Concurrent history backfill:
+#   python scripts/backfill_history.py [SYMBOL ...] [--concurrency 4] [--rate 4]
+# --rate caps request starts per second across all workers. Set DSE_BASE_URL
+# to run against scripts/stub_dse_server.py instead of dsebd.org.
+
+def get_db():
+    client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+    return client[DB_NAME]
+
+async def backfill_symbol(db, scraper, symbol, now):
+    gaps = missing_ranges(db, symbol, now - timedelta(days=MAX_HISTORY_DAYS), now)
+    if not gaps:
+        print(f"{symbol}: up to date")
+        return 0
+    written = 0
+    for first_day, last_day in gaps:
+        try:
+            bars = await scraper.historical(symbol, first_day, last_day)
+        except Exception as e:
+            print(f"{symbol}: error {e}")
+            return written
+        # Mongo writes are quick next to the page fetch; keep them on the loop thread.
+        written += record_range(db, symbol, first_day, last_day, bars, now)
+    print(f"{symbol}: {written} bars written")
+    return written
+
+async def backfill(symbols=None, concurrency=4, rate=4.0):
+    db = get_db()
+    if not symbols:
+        symbols = sorted(db.stocks.distinct("symbol"))
+
+    print(f"Syncing daily history for {len(symbols)} symbols "
+          f"({concurrency} concurrent, {rate} req/s)...")
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    async with AsyncScraper(concurrency=concurrency, rate=rate) as scraper:
+        written = await scraper.gather([backfill_symbol(db, scraper, s, now) for s in symbols])
+    total = sum(w for w in written if isinstance(w, int))
+    print(f"Done: {total} bars in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill daily history from the DSE archive")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=4.0, help="max requests started per second")
+    args = parser.parse_args()
+    asyncio.run(backfill([s.upper() for s in args.symbols], args.concurrency, args.rate))
@@ -0,0 +1,85 @@
+import os
+import sys
+import glob
+import time
+import pandas as pd
+from io import StringIO
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stocks.company_page import extract_company_page
+
+# Per-symbol parse cost of displayCompany.php, old pipeline vs the lxml
+# extractor, on saved pages:
+#   python scripts/bench_company_parse.py [fixture_dir] [repeats]
+#   python scripts/bench_company_parse.py --record GP ACI ...   (saves live pages)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SEARCH_PATTERNS = ["Authorized Capital", "Paid-up Capital", "Face Value", "Market Lot",
+                   "Total Number of Securities", "Outstanding Securities", "Market Category",
+                   "Listing Year", "Market Cap", "Market Capitalization", "Opening Price",
+                   "Open Price", "Day's Range", "Day Range"]
+
+def legacy_parse(html):
+    # Reproduces the parsing work of the previous scrape_company_details:
+    # a BeautifulSoup pass over the bordered tables, then pd.read_html over
+    # the whole page with repeated astype(str) scans per table and key.
+    soup = BeautifulSoup(html, 'html.parser')
+    tables = soup.find_all("table", {"class": "table table-bordered background-white"})
+    texts = []
+    for table in tables:
+        for row in table.find_all("tr"):
+            texts.append([c.get_text().strip() for c in row.find_all(["th", "td"])])
+
+    found = {}
+    for df in pd.read_html(StringIO(html)):
+        if df.shape[1] < 2:
+            continue
+        for pattern in SEARCH_PATTERNS:
+            mask = df[0].astype(str).str.contains(pattern, case=False, na=False)
+            if mask.any() and pattern not in found:
+                found[pattern] = str(df.loc[mask, 1].values[0]).strip()
+        df.astype(str)[0].str.contains("Share Holding Percentage", case=False, na=False).any()
+        df.astype(str)[0].str.contains("Current P/E", case=False, na=False).any()
+    return texts, found
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def record(symbols):
+    from app.stocks.http_client import fetch
+    from app.stocks.scraper import company_page_url
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for symbol in symbols:
+        path = os.path.join(FIXTURE_DIR, f'displayCompany_{symbol.upper()}.html')
+        with open(path, 'w') as f:
+            f.write(fetch(company_page_url(symbol.upper())))
+        print(f"Saved {path}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--record':
+        record(sys.argv[2:])
+        sys.exit(0)
+
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    paths = sorted(glob.glob(os.path.join(fixture_dir, 'displayCompany_*.html')))
+    if not paths:
+        print(f"No displayCompany_*.html fixtures in {fixture_dir}")
+        sys.exit(1)
+
+    for path in paths:
+        with open(path) as f:
+            html = f.read()
+        before = best_of(lambda: legacy_parse(html), repeats)
+        after = best_of(lambda: extract_company_page(html), repeats)
+        fields = len(extract_company_page(html))
+        print(f"{os.path.basename(path)}: legacy {before * 1000:7.1f} ms, "
+              f"extractor {after * 1000:6.1f} ms ({before / after:.1f}x), {fields} fields")
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stocks.ml_logic import LOOKBACK, forecast, prepare_history, train_model
+
+# Measures the non-training part of a prediction (window construction,
+# inference and response formatting) for one symbol's two years of closes:
+#   python scripts/bench_prediction.py [rows] [repeats]
+
+def legacy_forecast(df, model, scaler, prediction_days=7, lookback=LOOKBACK):
+    # The loop-based implementation this module used to ship, kept for comparison.
+    scaled_data = scaler.transform(df['close'].values.reshape(-1, 1))
+    X = []
+    for i in range(lookback, len(scaled_data)):
+        X.append(scaled_data[i-lookback:i, 0])
+    X = np.array(X)
+    X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+
+    predicted_scaled = model.predict(X, verbose=0)
+    prediction_series = []
+    for i in range(lookback):
+        prediction_series.append({"date": df['date'].iloc[i].strftime('%Y-%m-%d'), "value": float(df['close'].iloc[i])})
+
+    predicted_scaled = model.predict(X, verbose=0)
+    predicted_values = scaler.inverse_transform(predicted_scaled).flatten()
+    for i in range(len(predicted_values)):
+        prediction_series.append({"date": df['date'].iloc[i + lookback].strftime('%Y-%m-%d'), "value": float(predicted_values[i])})
+
+    current_batch = scaled_data[-lookback:].reshape((1, lookback, 1))
+    future_predictions = []
+    for _ in range(prediction_days):
+        current_pred = model.predict(current_batch, verbose=0)[0]
+        future_predictions.append(current_pred)
+        current_batch = np.append(current_batch[:, 1:, :], [[current_pred]], axis=1)
+    rescaled_preds = scaler.inverse_transform(future_predictions).flatten()
+
+    last_date = df['date'].iloc[-1]
+    for i, val in enumerate(rescaled_preds):
+        prediction_series.append({"date": (last_date + timedelta(days=i+1)).strftime('%Y-%m-%d'), "value": float(val)})
+
+    trend = 'upward' if float(rescaled_preds[0]) > float(df['close'].iloc[-1]) else 'downward'
+    actual_history = df[['date', 'close']].copy()
+    actual_history['date'] = actual_history['date'].dt.strftime('%Y-%m-%d')
+    return actual_history.to_dict('records'), prediction_series, trend
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    dates = pd.bdate_range(end=pd.Timestamp.today(), periods=rows)
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, rows))
+    df = prepare_history([{"date": d, "close": c} for d, c in zip(dates, closes)])
+
+    model, scaler = train_model(df, epochs=1)
+    legacy = legacy_forecast(df, model, scaler)
+    current = forecast(df, model, scaler)
+    drift = max(abs(a['value'] - b['value']) for a, b in zip(legacy[1], current[1]))
+    print(f"rows={rows} max |legacy - current| = {drift:.2e}")
+
+    before = best_of(lambda: legacy_forecast(df, model, scaler), repeats)
+    after = best_of(lambda: forecast(df, model, scaler), repeats)
+    print(f"legacy:  {before * 1000:8.1f} ms")
+    print(f"current: {after * 1000:8.1f} ms  ({before / after:.1f}x)")
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import pandas as pd
+from io import StringIO
+from datetime import datetime
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stocks.scraper import parse_historical_html, parse_latest_prices
+
+# Row-by-row parsers vs the vectorized column parsers on the stored
+# latest-price and day-end archive fixtures:
+#   python scripts/bench_table_parse.py [repeats]
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def legacy_latest_prices(html):
+    # The previous parse_latest_prices: ten get_text/strip/replace
+    # conversions per BeautifulSoup row.
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find("table", {"class": "table table-bordered background-white shares-table fixedHeader"})
+    stocks = []
+    for row in table.find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) < 11: continue
+        try:
+            stock_data = {
+                'symbol': cells[1].get_text().strip(),
+                'ltp': float(cells[2].get_text().strip().replace(',', '')),
+                'high': float(cells[3].get_text().strip().replace(',', '')),
+                'low': float(cells[4].get_text().strip().replace(',', '')),
+                'closep': float(cells[5].get_text().strip().replace(',', '')) if cells[5].get_text().strip() != '0' else None,
+                'ycp': float(cells[6].get_text().strip().replace(',', '')),
+                'change': float(cells[7].get_text().strip().replace(',', '')),
+                'trade': int(cells[8].get_text().strip().replace(',', '')),
+                'value': float(cells[9].get_text().strip().replace(',', '')),
+                'volume': int(cells[10].get_text().strip().replace(',', '')),
+                'updated_at': datetime.utcnow()
+            }
+            if stock_data['ycp'] > 0:
+                stock_data['percent_change'] = round((stock_data['change'] / stock_data['ycp']) * 100, 2)
+            else: stock_data['percent_change'] = 0
+            stock_data['open'] = stock_data['closep'] if stock_data['closep'] else stock_data['ycp']
+            stocks.append(stock_data)
+        except: continue
+    return stocks
+
+def legacy_historical(html):
+    # The previous parse_historical_html: df.iterrows() with a per-row closure.
+    history = []
+    for df in pd.read_html(StringIO(html)):
+        df.columns = [str(c).upper().strip() for c in df.columns]
+        cols = df.columns.tolist()
+        if "DATE" in cols and "HIGH" in cols and "LOW" in cols and "VOLUME" in cols:
+            open_col = next((c for c in cols if "OPEN" in c), None)
+            close_col = next((c for c in cols if "CLOSE" in c), None)
+            if open_col and close_col:
+                for _, row in df.iterrows():
+                    try:
+                        def parse_float(val): return float(str(val).replace(',', ''))
+                        history.append({
+                            "date": str(row['DATE']),
+                            "open": parse_float(row[open_col]),
+                            "high": parse_float(row['HIGH']),
+                            "low": parse_float(row['LOW']),
+                            "close": parse_float(row[close_col]),
+                            "volume": parse_float(row['VOLUME'])
+                        })
+                    except: continue
+                break
+    history.sort(key=lambda x: x['date'])
+    return history
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def without_timestamps(rows):
+    return [{k: v for k, v in row.items() if k != 'updated_at'} for row in rows]
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cases = [
+        ('latest_share_price.html', legacy_latest_prices, parse_latest_prices),
+        ('day_end_archive_GP.html', legacy_historical, parse_historical_html),
+    ]
+    for name, legacy, vectorized in cases:
+        with open(os.path.join(FIXTURE_DIR, name)) as f:
+            html = f.read()
+        rows = vectorized(html)
+        same = without_timestamps(legacy(html)) == without_timestamps(rows)
+        before = best_of(lambda: legacy(html), repeats)
+        after = best_of(lambda: vectorized(html), repeats)
+        print(f"{name}: legacy {before * 1000:7.1f} ms, vectorized {after * 1000:6.1f} ms "
+              f"({before / after:.1f}x), {len(rows)} rows, {'same output' if same else 'OUTPUT DIFFERS'}")
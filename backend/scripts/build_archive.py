@@ -0,0 +1,19 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stocks.archive import archive_dir_for, build_archive, find_csv
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else find_csv()
+    if not csv_path or not os.path.exists(csv_path):
+        print("DSE_Data.csv not found.")
+        sys.exit(1)
+
+    out_dir = archive_dir_for(csv_path)
+    print(f"Converting {csv_path} -> {out_dir}...")
+    started = time.perf_counter()
+    count = build_archive(csv_path, out_dir)
+    print(f"Archived {count} symbols in {time.perf_counter() - started:.2f}s")
@@ -1,7 +1,7 @@
 import os
 import sys
-import requests
 import pandas as pd
+from io import StringIO
 from pymongo import MongoClient
 from datetime import datetime
 from dotenv import load_dotenv
@@ -14,6 +14,8 @@ MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = "bdshare"
 
 import certifi
+from app.stocks.ingest import bulk_upsert, format_stats
+from app.stocks.http_client import fetch
 
 def get_db():
     client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
@@ -24,7 +26,7 @@ def scrape_stock_prices():
     print(f"Fetching data from {url}...")
     
     try:
-        dfs = pd.read_html(url, header=0)
+        dfs = pd.read_html(StringIO(fetch(url)), header=0)
         
         target_df = None
         for df in dfs:
@@ -103,21 +105,8 @@ def scrape_stock_prices():
     
         
         db = get_db()
-        
-        operations = []
-        from pymongo import UpdateOne
-        for stock in stocks:
-            operations.append(
-                UpdateOne(
-                    {"symbol": stock["symbol"]},
-                    {"$set": stock},
-                    upsert=True
-                )
-            )
-            
-        if operations:
-            result = db.stocks.bulk_write(operations)
-            print(f"Upserted stocks: {result.upserted_count}, Modified: {result.modified_count}")
+        stats = bulk_upsert(db.stocks, stocks)
+        print(f"Stocks: {format_stats(stats)}")
             
      
     except Exception as e:
@@ -127,8 +116,7 @@ def scrape_indices():
     url = "https://dsebd.org/index.php"
     print(f"Fetching indices from {url}...")
     try:
-        response = requests.get(url)
-        dfs = pd.read_html(response.content)
+        dfs = pd.read_html(StringIO(fetch(url)))
         
         indices_data = []
         timestamp = datetime.now()
@@ -173,19 +161,8 @@ def scrape_indices():
         print(f"Found {len(indices_data)} indices: {[x['name'] for x in indices_data]}")
         
         db = get_db()
-        ops = []
-        from pymongo import UpdateOne
-        for idx in indices_data:
-            ops.append(
-                UpdateOne(
-                    {"name": idx["name"]},
-                    {"$set": idx},
-                    upsert=True
-                )
-            )
-        if ops:
-            db.indices.bulk_write(ops)
-            print("Indices updated.")
+        stats = bulk_upsert(db.indices, indices_data, key="name")
+        print(f"Indices: {format_stats(stats)}")
 
     except Exception as e:
         print(f"Error scraping indices: {e}")
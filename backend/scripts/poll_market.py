@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import asyncio
+from pymongo import MongoClient
+from datetime import datetime
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = "bdshare"
+
+# Seconds between refreshes while DSE is trading, and outside trading hours.
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL_SECONDS", 60))
+OFF_HOURS_INTERVAL = int(os.getenv("POLL_OFF_HOURS_INTERVAL_SECONDS", 1800))
+
+import certifi
+from app.stocks.async_scraper import AsyncScraper
+from app.stocks.market_feed import is_trading_hours, refresh_indices, refresh_latest_prices
+
+def get_db():
+    client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+    return client[DB_NAME]
+
+async def scrape_feeds():
+    # Both pages are fetched concurrently; a failure comes back as an exception.
+    async with AsyncScraper(concurrency=2) as scraper:
+        return await scraper.gather([scraper.latest_prices(), scraper.market_indices()])
+
+def poll_once(db):
+    started = time.monotonic()
+    scraped = asyncio.run(scrape_feeds())
+    for (name, refresh), rows in zip((("latest prices", refresh_latest_prices), ("indices", refresh_indices)), scraped):
+        try:
+            if isinstance(rows, Exception):
+                raise rows
+            result = refresh(db, rows)
+            print(f"[{datetime.utcnow().isoformat()}] {name}: {len(result)} rows")
+        except Exception as e:
+            print(f"[{datetime.utcnow().isoformat()}] Error refreshing {name}: {e}")
+    return time.monotonic() - started
+
+def run():
+    db = get_db()
+    print(f"Polling DSE every {POLL_INTERVAL}s in trading hours, {OFF_HOURS_INTERVAL}s otherwise")
+    while True:
+        elapsed = poll_once(db)
+        interval = POLL_INTERVAL if is_trading_hours() else OFF_HOURS_INTERVAL
+        time.sleep(max(interval - elapsed, 1))
+
+if __name__ == "__main__":
+    if "--once" in sys.argv:
+        poll_once(get_db())
+    else:
+        run()
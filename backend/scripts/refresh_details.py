@@ -0,0 +1,43 @@
+import os
+import sys
+import argparse
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = "bdshare"
+
+import certifi
+from app.stocks.details_refresh import refresh_company_details, stale_symbols
+from app.stocks.http_client import MAX_PER_HOST
+
+# Nightly refresh of company fundamentals:
+#   python scripts/refresh_details.py [--workers N] [--all] [SYMBOL ...]
+
+def get_db():
+    client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+    return client[DB_NAME]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh company details for listed symbols.")
+    parser.add_argument("symbols", nargs="*", help="Symbols to refresh (default: all stale ones)")
+    parser.add_argument("--workers", type=int, default=None, help="Default: DSE_MAX_CONCURRENCY")
+    parser.add_argument("--all", action="store_true", help="Refresh every symbol, not only stale ones")
+    args = parser.parse_args()
+
+    db = get_db()
+    if args.symbols:
+        symbols = [s.upper() for s in args.symbols]
+    elif args.all:
+        symbols = sorted(db.stocks.distinct("symbol"))
+    else:
+        symbols = stale_symbols(db)
+
+    workers = args.workers or MAX_PER_HOST
+    print(f"Refreshing details for {len(symbols)} symbols with {workers} workers...")
+    stats = refresh_company_details(db, symbols, workers=workers)
+    print(f"Done: {stats}")
@@ -0,0 +1,85 @@
+import os
+import re
+import sys
+import time
+import argparse
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Serves recorded DSE pages from scripts/fixtures so the scrapers can run
+# offline:
+#   python scripts/stub_dse_server.py [--port 8765] [--delay 0.2]
+#   DSE_BASE_URL=http://127.0.0.1:8765 python scripts/backfill_history.py GP
+# Pages for symbols without a fixture come back as an empty page, which is
+# what dsebd.org returns for an unknown code.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+EMPTY_PAGE = "<html><body><p>No data found</p></body></html>"
+
+ROW_DATE = re.compile(r'<td>(\d{4}-\d{2}-\d{2})</td>')
+
+def archive_rows_between(body, query):
+    # Archive fixtures hold one row per line; keep the requested date range.
+    start = query.get('startDate', ['0000-00-00'])[0]
+    end = query.get('endDate', ['9999-99-99'])[0]
+    lines = []
+    for line in body.splitlines():
+        match = ROW_DATE.search(line)
+        if match is None or start <= match.group(1) <= end:
+            lines.append(line)
+    return '\n'.join(lines)
+
+def fixture_for(path, query):
+    symbol = (query.get('name') or query.get('inst') or [''])[0].upper()
+    if path == '/displayCompany.php':
+        return f'displayCompany_{symbol}.html'
+    if path == '/day_end_archive.php':
+        return f'day_end_archive_{symbol}.html'
+    if path == '/latest_share_price_scroll_by_value.php':
+        return 'latest_share_price.html'
+    if path in ('/', '/index.php'):
+        return 'home.html'
+    return None
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        name = fixture_for(url.path, parse_qs(url.query))
+        if name is None:
+            self.send_error(404)
+            return
+
+        query = parse_qs(url.query)
+        fixture = os.path.join(FIXTURE_DIR, name)
+        body = EMPTY_PAGE
+        if os.path.exists(fixture):
+            with open(fixture) as f:
+                body = f.read()
+            if url.path == '/day_end_archive.php':
+                body = archive_rows_between(body, query)
+
+        if self.delay:
+            time.sleep(self.delay)
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded DSE pages locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0, help="seconds of simulated latency per request")
+    args = parser.parse_args()
+
+    StubHandler.delay = args.delay
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubHandler)
+    print(f"Serving {FIXTURE_DIR} on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,98 @@
+import os
+import sys
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pymongo import MongoClient
+from datetime import datetime
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = "bdshare"
+
+import certifi
+
+# Run after market close (e.g. from a scheduler) to train every listed symbol:
+#   python scripts/train_models.py [--workers N] [--force] [SYMBOL ...]
+# Progress is recorded per symbol in `model_training_status`, so an
+# interrupted run picks up where it left off when started again the same day.
+
+def get_db():
+    client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+    return client[DB_NAME]
+
+# One client per worker process, opened by init_worker and reused for
+# every symbol that process trains.
+_worker_db = None
+
+def init_worker():
+    global _worker_db
+    _worker_db = get_db()
+    # Each process trains one symbol at a time; keep TensorFlow from
+    # oversubscribing the cores the pool is already spreading work over.
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def train_symbol(symbol, force=False):
+    from app.stocks.ml_logic import train_and_register
+    from app.stocks.prediction import load_prediction_history
+
+    started = datetime.utcnow()
+    history = load_prediction_history(_worker_db, symbol)
+    status, last_date = train_and_register(_worker_db, symbol, history, force=force)
+    return {
+        "status": status,
+        "last_date": last_date,
+        "rows": len(history),
+        "seconds": round((datetime.utcnow() - started).total_seconds(), 1)
+    }
+
+def pending_symbols(db, symbols, run_date):
+    done = set(db.model_training_status.distinct(
+        "symbol",
+        {"run_date": run_date, "status": {"$in": ["trained", "fresh", "insufficient"]}}
+    ))
+    return [s for s in symbols if s not in done]
+
+def record_status(db, symbol, run_date, result):
+    db.model_training_status.update_one(
+        {"symbol": symbol},
+        {"$set": {**result, "run_date": run_date, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+def train_all(symbols=None, workers=None, force=False):
+    db = get_db()
+    run_date = datetime.utcnow().strftime("%Y-%m-%d")
+    symbols = symbols or sorted(db.stocks.distinct("symbol"))
+    if not force:
+        symbols = pending_symbols(db, symbols, run_date)
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Training {len(symbols)} symbols with {workers} workers...")
+
+    # TensorFlow is not fork-safe, so workers are spawned fresh.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_worker) as pool:
+        futures = {pool.submit(train_symbol, s, force): s for s in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": "failed", "error": str(e)}
+            record_status(db, symbol, run_date, result)
+            print(f"{symbol}: {result}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train forecasting models for listed symbols.")
+    parser.add_argument("symbols", nargs="*", help="Symbols to train (default: all in stocks)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Retrain even if a fresh model exists")
+    args = parser.parse_args()
+    train_all([s.upper() for s in args.symbols], workers=args.workers, force=args.force)
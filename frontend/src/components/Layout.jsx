@@ -25,21 +25,69 @@ const Layout = () => {
     };
 
     useEffect(() => {
-        const fetchTickerStocks = async () => {
+        // Live prices arrive over Server-Sent Events: a snapshot on connect,
+        // then only the fields that changed on each refresh.
+        const prices = new Map();
+        const pickTickerStocks = () => {
+            const shuffled = [...prices.values()].sort(() => 0.5 - Math.random());
+            setTickerStocks(shuffled.slice(0, 10));
+        };
+
+        const fields = 'symbol,ltp,change,percent_change';
+        const loadSnapshot = (rows) => {
+            prices.clear();
+            rows.forEach((stock) => prices.set(stock.symbol, stock));
+            pickTickerStocks();
+        };
+        const applyChanges = (changes) => {
+            Object.entries(changes).forEach(([symbol, changed]) => {
+                if (prices.has(symbol)) prices.set(symbol, { ...prices.get(symbol), ...changed });
+            });
+        };
+
+        // Fallback when the server refuses the stream (503 at its per-worker
+        // cap): poll the change log with a cursor instead.
+        let pollTimer = null;
+        let cursor = null;
+        let closed = false;
+        const poll = async () => {
             try {
-                const res = await axios.get('/stocks/latest-prices');
-                // Get 10 random stocks for the ticker
-                const shuffled = res.data.sort(() => 0.5 - Math.random());
-                setTickerStocks(shuffled.slice(0, 10));
+                const res = await axios.get('/stocks/latest-prices/changes', { params: { since: cursor } });
+                if (res.data.reset) {
+                    const snapshot = await axios.get(`/stocks/latest-prices?fields=${fields}`);
+                    loadSnapshot(snapshot.data);
+                } else {
+                    applyChanges(res.data.changes);
+                }
+                cursor = res.data.cursor;
             } catch (err) {
-                console.error('Failed to fetch ticker stocks:', err);
+                console.error('Failed to fetch ticker prices:', err);
             }
+            if (!closed) pollTimer = setTimeout(poll, 10000);
         };
 
-        fetchTickerStocks();
-        // Refresh ticker every 10 seconds
-        const interval = setInterval(fetchTickerStocks, 10000);
-        return () => clearInterval(interval);
+        const source = new EventSource(`${axios.defaults.baseURL}/stocks/stream?fields=${fields}`);
+        source.addEventListener('snapshot', (event) => loadSnapshot(JSON.parse(event.data)));
+        source.addEventListener('delta', (event) => applyChanges(JSON.parse(event.data)));
+        source.onerror = (err) => {
+            // CONNECTING means the browser is retrying; CLOSED means the
+            // server answered with an error status and it will not.
+            if (source.readyState === EventSource.CLOSED) {
+                console.warn('Ticker stream unavailable, polling instead:', err);
+                poll();
+            } else {
+                console.error('Ticker stream interrupted, reconnecting:', err);
+            }
+        };
+
+        // Reshuffle the ticker every 10 seconds from the local copy
+        const interval = setInterval(pickTickerStocks, 10000);
+        return () => {
+            closed = true;
+            clearInterval(interval);
+            clearTimeout(pollTimer);
+            source.close();
+        };
     }, []);
 
     return (
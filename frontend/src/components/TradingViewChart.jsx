@@ -72,7 +72,7 @@ const TradingViewChart = ({ data, chartType, timeRange, predictionData, height =
                 width: chartContainerRef.current.clientWidth,
                 height: height,
                 timeScale: {
-                    timeVisible: false, // DSE doesn't have intraday data, only daily data
+                    timeVisible: timeRange === '1D', // 1D shows the poller's intraday bars
                     secondsVisible: false,
                     borderColor: isDark ? '#2A2E39' : '#E5E7EB',
                     fixLeftEdge: false,
@@ -100,7 +100,7 @@ const Dashboard = () => {
                     <div className="relative w-full sm:w-72">
                         <Search className="absolute left-3 top-1/2 -translate-y-1/2 text-text-dimmed" size={18} />
                         <input
-                            type="text" placeholder="Search by symbol..." value={searchTerm}
+                            type="text" placeholder="Search by symbol or company..." value={searchTerm}
                             onChange={(e) => setSearchTerm(e.target.value)}
                             className="w-full bg-darker border border-border rounded-lg pl-10 pr-4 py-2.5 text-sm focus:outline-none focus:border-secondary focus:ring-1 focus:ring-secondary text-text-main placeholder-text-dimmed transition"
                         />